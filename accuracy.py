@@ -0,0 +1,84 @@
+""" two-phase accuracy for bulk screening, see solve(..., accuracy=...).
+
+most screening questions only need to know whether every voltage is clearly
+within its limits or clearly outside them, which a loose barrier tolerance
+answers in fewer iterations. each case is solved loose first and the answer
+kept if it is settled: optimal, passing the exactness check of verify.py,
+and with no voltage within margin of vmin or vmax. only the rest (borderline
+voltages, or a suspicious status or check) are solved again, on the same
+model, at the tight tolerance.
+
+a TwoPhase policy counts how many solves each phase settled, for the
+throughput gain, like ResultCache counts its hits. the counts are per
+process
+"""
+from __future__ import division, print_function
+from numpy import abs as nabs
+from verify import verify
+
+
+class TwoPhase(object):
+    """ loose and tight: the backend tolerances of the two phases (see
+    backends.py), tight=None being the backend's default. vmin, vmax: the
+    voltage limits, and margin how close to them a loose answer's voltages
+    may come. max_mismatch, max_slack: the exactness check of verify.py that
+    a loose answer must pass, looser than verify's own since the loose
+    answer is less accurate; its voltages can be off by a few thousandths,
+    hence the margin. with a looser tolerance than about 1e-5 most loose
+    answers fail the check and go on to the tight phase
+
+    loose, borderline, suspicious: how many solves were settled in the loose
+    phase, and how many were solved again because a voltage was near a limit
+    or the loose answer was suspicious
+    """
+
+    def __init__(self, loose=1e-5, tight=None, vmin=.95, vmax=1.05,
+                 margin=.01, max_mismatch=1e-2, max_slack=1e-3):
+        self.loose_tol, self.tight_tol = loose, tight
+        self.vmin, self.vmax, self.margin = vmin, vmax, margin
+        self.max_mismatch, self.max_slack = max_mismatch, max_slack
+        self.loose = self.borderline = self.suspicious = 0
+
+    @property
+    def settings(self):
+        """ everything that can change an answer, see resultcache.py """
+        return (self.loose_tol, self.tight_tol, self.vmin, self.vmax,
+                self.margin, self.max_mismatch, self.max_slack)
+
+    @property
+    def tight(self):
+        """ the number of solves settled in the tight phase """
+        return self.borderline + self.suspicious
+
+    @property
+    def loose_rate(self):
+        total = self.loose + self.tight
+        return self.loose/total if total else 0.
+
+    def counters(self):
+        return {'loose': self.loose, 'tight': self.tight,
+                'borderline': self.borderline, 'suspicious': self.suspicious,
+                'loose_rate': self.loose_rate}
+
+    def triage(self, case, solution, result):
+        """ 'settled', 'borderline' or 'suspicious': what to do with the loose
+        phase's ConicSolution and its FlowResult (None unless optimal) """
+        if solution.status != 'optimal' or result is None:
+            return 'suspicious'
+        if not verify(case, result, self.max_mismatch, self.max_slack).exact:
+            return 'suspicious'
+        near = ((nabs(result.V - self.vmin) < self.margin) |
+                (nabs(result.V - self.vmax) < self.margin))
+        return 'borderline' if near.any() else 'settled'
+
+    def count(self, verdict):
+        if verdict == 'settled':
+            self.loose += 1
+        elif verdict == 'borderline':
+            self.borderline += 1
+        else:
+            self.suspicious += 1
+
+    def __repr__(self):
+        return 'TwoPhase(%s)' % ', '.join(
+            '%s=%r' % item for item in sorted(self.counters().items()))
@@ -0,0 +1,24 @@
+""" files written whole or not at all. the contents go to a temporary file
+next to the destination, which is then renamed over it, so other processes
+reading the destination (concurrent loads, workers, other users of a cache
+directory) only ever see the old file or the complete new one
+"""
+from __future__ import division, print_function
+import os
+from contextlib import contextmanager
+from tempfile import NamedTemporaryFile
+
+
+@contextmanager
+def atomic_write(path):
+    """ yields a binary file object for path's new contents. path is replaced
+    when the block ends, and left as it was if the block raises """
+    directory = os.path.dirname(os.path.abspath(path))
+    tmp = NamedTemporaryFile(dir=directory, suffix='.tmp', delete=False)
+    try:
+        with tmp:
+            yield tmp
+        os.replace(tmp.name, path)
+    except BaseException:
+        os.remove(tmp.name)
+        raise
@@ -0,0 +1,353 @@
+""" conic solver backends. each backend takes a ConicProblem
+
+    minimize c'x  subject to  Ax + s = b,  s in K
+
+where K is a zero cone (the first `zero` rows of A), a nonnegative cone (the
+next `nonneg` rows) and one second order cone per entry of `soc` (the
+remaining rows, in order, the first row of each cone bounding the norm of the
+rest). every backend's solve returns a ConicSolution, so their timings and
+iteration counts can be compared directly.
+
+dual is the dual vector z of the constraint rows (A'z + c = 0, z in the dual
+cone) when optimal, and a certificate of infeasibility (A'z = 0, b'z < 0, z
+in the dual cone) when infeasible, if the backend provides one. only gurobi
+is multithreaded; the others accept and ignore the threads argument.
+
+backends are objects so that a problem can be set up once, then have its
+right-hand side changed with update_b(rows, values), or existing
+coefficients of A with update_A(rows, cols, values), and be re-solved.
+
+tol sets the backend's convergence tolerance (gurobi's BarQCPConvTol,
+clarabel's gap and feasibility tolerances, scs's eps, ecos's feastol,
+abstol and reltol), None leaving its default; set_tol(tol) changes it
+between solves.
+
+duals=True asks for the dual vector. gurobi only computes QCP duals when
+asked (its QCPDual parameter), at some cost to each solve, so without it
+gurobi's dual is None; the other backends always return theirs
+"""
+from __future__ import division, print_function
+from collections import namedtuple
+from time import time
+from numpy import array, asarray, cumsum, concatenate, searchsorted
+from scipy.sparse import csc_matrix, hstack, identity
+
+
+ConicProblem = namedtuple('ConicProblem', ['c', 'A', 'b', 'zero', 'nonneg',
+                                           'soc'])
+ConicSolution = namedtuple('ConicSolution', ['x', 'dual', 'status', 'backend',
+                                             'solve_time', 'iterations'])
+
+
+def set_entries(A, rows, cols, values):
+    """ sets A[rows, cols] = values in the CSC matrix A (with sorted
+    indices) in place. returns the positions of the entries in A.data, or
+    None if some weren't stored and A's sparsity pattern had to change """
+    positions = []
+    for row, col in zip(rows, cols):
+        lo, hi = A.indptr[col], A.indptr[col+1]
+        k = lo + searchsorted(A.indices[lo:hi], row)
+        positions.append(k if k < hi and A.indices[k] == row else -1)
+    positions = array(positions, dtype=int)
+    values = asarray(values, dtype=float)
+    found = positions >= 0
+    A.data[positions[found]] = values[found]
+    if found.all():
+        return positions
+    A[asarray(rows)[~found], asarray(cols)[~found]] = values[~found]
+    return None
+
+
+def cone_heads(problem):
+    """ returns the row of A where each second order cone starts """
+    sizes = array(problem.soc, dtype=int)
+    start = problem.zero + problem.nonneg
+    return start + concatenate([[0], cumsum(sizes)[:-1]]).astype(int), sizes
+
+
+class GurobiBackend(object):
+    """ keeps one gurobi model alive between solves. gurobi's barrier (the
+    only algorithm for SOCPs) can't be warm started, but re-solving after
+    update_b still skips the model build """
+
+    def __init__(self, problem, threads=0, tol=None, duals=False):
+        from gurobipy import Model as GurobiModel, GRB, GurobiError
+        self.GRB, self.GurobiError = GRB, GurobiError
+        A = problem.A.tocsr()
+        self.b = array(problem.b, dtype=float)
+        nx = A.shape[1]
+        z, k = problem.zero, problem.zero + problem.nonneg
+        ns = A.shape[0] - k
+        self.blocks = [0, z, k, len(self.b)]
+        m = GurobiModel("jabr")
+        m.params.outputFlag = 0
+        m.params.threads = threads
+        if duals:
+            m.params.QCPDual = 1
+        self.duals = duals
+        y = m.addMVar(nx + ns, lb=-GRB.INFINITY)
+        self.x, s = y[:nx], y[nx:]
+        self.constrs = [m.addMConstr(A[:z], self.x, '=', self.b[:z]),
+                        m.addMConstr(A[z:k], self.x, '<', self.b[z:k]),
+                        m.addMConstr(hstack([A[k:], identity(ns)]).tocsr(), y,
+                                     '=', self.b[k:])]
+        heads, sizes = cone_heads(problem)
+        heads = heads - k
+        for d in set(sizes):
+            h = heads[sizes == d]
+            s[h].lb = 0
+            norm = sum(s[h+i]*s[h+i] for i in range(1, d))
+            m.addConstr(s[h]*s[h] >= norm)
+        m.setMObjective(None, asarray(problem.c), 0.0, xc=self.x,
+                        sense=GRB.MINIMIZE)
+        self.model = m
+        self.set_tol(tol)
+        self.rows = self.columns = None
+
+    def update_A(self, rows, cols, values):
+        if self.rows is None:
+            # one Constr per row and one Var per column, for chgCoeff
+            self.rows = sum((constr.tolist() for constr in self.constrs), [])
+            self.columns = self.x.tolist()
+        for row, col, value in zip(rows, cols, values):
+            self.model.chgCoeff(self.rows[row], self.columns[col], value)
+
+    def set_tol(self, tol):
+        self.model.params.BarQCPConvTol = 1e-6 if tol is None else tol
+
+    def update_b(self, rows, values):
+        rows = asarray(rows, dtype=int)
+        self.b[rows] = values
+        for block, constr in enumerate(self.constrs):
+            lo, hi = self.blocks[block], self.blocks[block+1]
+            if ((rows >= lo) & (rows < hi)).any():
+                constr.RHS = self.b[lo:hi]
+
+    def solve(self):
+        GRB = self.GRB
+        statuses = {GRB.OPTIMAL: 'optimal', GRB.INFEASIBLE: 'infeasible',
+                    GRB.INF_OR_UNBD: 'infeasible', GRB.UNBOUNDED: 'unbounded'}
+        start = time()
+        m = self.model
+        m.optimize()
+        status = statuses.get(m.status, 'error %d' % m.status)
+        xopt = dual = None
+        if m.status == GRB.OPTIMAL:
+            xopt = self.x.X
+            if self.duals:
+                try:
+                    # gurobi's duals are for c - A'pi, ours for c + A'z
+                    dual = -concatenate([constr.Pi
+                                         for constr in self.constrs])
+                except self.GurobiError:
+                    pass  # gurobi gives up on QCP duals if barrier is loose
+        return ConicSolution(xopt, dual, status, 'gurobi', time() - start,
+                             m.BarIterCount)
+
+
+class ClarabelBackend(object):
+    """ clarabel updates b in place when its presolve allows it and rebuilds
+    the solver otherwise, likewise for the coefficients of A. it has no warm
+    start """
+
+    def __init__(self, problem, threads=0, tol=None, duals=False):
+        self.problem = problem
+        self.A = csc_matrix(problem.A, copy=True)
+        self.A.sort_indices()
+        self.b = array(problem.b, dtype=float)
+        self.tol = tol
+        self.solver = None
+
+    def set_tol(self, tol):
+        self.tol = tol
+        if self.solver is not None:
+            self.solver.update(settings=self.settings())
+
+    def settings(self):
+        import clarabel
+        settings = clarabel.DefaultSettings()
+        settings.verbose = False
+        if self.tol is not None:
+            settings.tol_gap_abs = settings.tol_gap_rel = self.tol
+            settings.tol_feas = self.tol
+        return settings
+
+    def build(self):
+        import clarabel
+        problem = self.problem
+        nx = problem.A.shape[1]
+        cones = []
+        if problem.zero:
+            cones.append(clarabel.ZeroConeT(problem.zero))
+        if problem.nonneg:
+            cones.append(clarabel.NonnegativeConeT(problem.nonneg))
+        cones += [clarabel.SecondOrderConeT(int(d)) for d in problem.soc]
+        self.solver = clarabel.DefaultSolver(
+            csc_matrix((nx, nx)), asarray(problem.c), self.A.copy(),
+            self.b.copy(), cones, self.settings())
+
+    def update_b(self, rows, values):
+        self.b[rows] = values
+        if self.solver is not None and self.solver.is_data_update_allowed():
+            self.solver.update(b=self.b.copy())
+        else:
+            self.solver = None
+
+    def update_A(self, rows, cols, values):
+        positions = set_entries(self.A, rows, cols, values)
+        if (positions is not None and self.solver is not None and
+                self.solver.is_data_update_allowed()):
+            self.solver.update(A=(positions, self.A.data[positions]))
+        else:
+            self.solver = None
+
+    def solve(self):
+        statuses = {'Solved': 'optimal', 'PrimalInfeasible': 'infeasible',
+                    'DualInfeasible': 'unbounded'}
+        start = time()
+        if self.solver is None:
+            self.build()
+        sol = self.solver.solve()
+        status = statuses.get(str(sol.status), str(sol.status))
+        xopt = array(sol.x) if status == 'optimal' else None
+        dual = array(sol.z) if status in ('optimal', 'infeasible') else None
+        return ConicSolution(xopt, dual, status, 'clarabel', time() - start,
+                             sol.iterations)
+
+
+class SCSBackend(object):
+    """ scs updates b in place and warm starts from the previous solution.
+    changing A or the tolerance sets the solver up again, still warm started
+    """
+
+    def __init__(self, problem, threads=0, tol=None, duals=False):
+        self.problem = problem
+        self.A = csc_matrix(problem.A, copy=True)
+        self.A.sort_indices()
+        self.b = array(problem.b, dtype=float)
+        self.warm = None
+        self.set_tol(tol)
+
+    def set_tol(self, tol):
+        self.tol = tol
+        self.build()
+
+    def build(self):
+        import scs
+        problem = self.problem
+        eps = 1e-9 if self.tol is None else self.tol
+        data = {'A': self.A.copy(), 'b': self.b.copy(),
+                'c': asarray(problem.c)}
+        cone = {'z': problem.zero, 'l': problem.nonneg,
+                'q': [int(d) for d in problem.soc]}
+        self.solver = scs.SCS(data, cone, verbose=False, eps_abs=eps,
+                              eps_rel=eps)
+
+    def update_A(self, rows, cols, values):
+        set_entries(self.A, rows, cols, values)
+        self.build()
+
+    def update_b(self, rows, values):
+        self.b[rows] = values
+        self.solver.update(b=self.b.copy())
+
+    def solve(self):
+        statuses = {'solved': 'optimal', 'infeasible': 'infeasible',
+                    'unbounded': 'unbounded'}
+        start = time()
+        if self.warm is None:
+            sol = self.solver.solve(warm_start=False)
+        else:
+            sol = self.solver.solve(True, *self.warm)
+        self.warm = sol['x'], sol['y'], sol['s']
+        info = sol['info']
+        status = statuses.get(info['status'], info['status'])
+        xopt = sol['x'] if status == 'optimal' else None
+        dual = sol['y'] if status in ('optimal', 'infeasible') else None
+        return ConicSolution(xopt, dual, status, 'scs', time() - start,
+                             info['iter'])
+
+
+class ECOSBackend(object):
+    """ ecos has no persistent solver object; every solve starts over """
+
+    def __init__(self, problem, threads=0, tol=None, duals=False):
+        self.problem = problem
+        self.A = csc_matrix(problem.A, copy=True)
+        self.A.sort_indices()
+        self.b = array(problem.b, dtype=float)
+        self.tol = tol
+
+    def set_tol(self, tol):
+        self.tol = tol
+
+    def update_A(self, rows, cols, values):
+        set_entries(self.A, rows, cols, values)
+
+    def update_b(self, rows, values):
+        self.b[rows] = values
+
+    def solve(self):
+        import ecos
+        statuses = {0: 'optimal', 1: 'infeasible', 2: 'unbounded'}
+        problem = self.problem
+        A = self.A
+        b = self.b
+        z = problem.zero
+        dims = {'l': problem.nonneg, 'q': [int(d) for d in problem.soc]}
+        tols = {}
+        if self.tol is not None:
+            tols = {'feastol': self.tol, 'abstol': self.tol,
+                    'reltol': self.tol}
+        start = time()
+        sol = ecos.solve(asarray(problem.c), A[z:], b[z:], dims, A[:z], b[:z],
+                         verbose=False, **tols)
+        info = sol['info']
+        status = statuses.get(info['exitFlag'], 'error %d' % info['exitFlag'])
+        xopt = sol['x'] if status == 'optimal' else None
+        dual = None
+        if status in ('optimal', 'infeasible'):
+            dual = concatenate([sol['y'], sol['z']])
+        return ConicSolution(xopt, dual, status, 'ecos', time() - start,
+                             info['iter'])
+
+
+BACKENDS = {'gurobi': GurobiBackend, 'clarabel': ClarabelBackend,
+            'scs': SCSBackend, 'ecos': ECOSBackend}
+
+
+def open_backend(problem, backend='gurobi', threads=0, tol=None,
+                 duals=False):
+    """ sets up problem in the named backend, to be solved (and possibly
+    updated and re-solved) later. threads=0 lets the backend choose, tol=None
+    keeps its default tolerance, duals=True asks for the dual vector """
+    if backend not in BACKENDS:
+        raise ValueError("unknown backend %r, choose from %s" %
+                         (backend, ', '.join(sorted(BACKENDS))))
+    return BACKENDS[backend](problem, threads, tol, duals)
+
+
+def solve_conic(problem, backend='gurobi', threads=0, tol=None,
+                duals=False):
+    """ solves problem once with the named backend """
+    return open_backend(problem, backend, threads, tol, duals).solve()
+
+
+if __name__ == '__main__':
+    import sys
+    from glob import glob
+    from jabr import build_conic_problem
+    from loadcase import load_case
+    backends = sys.argv[1:] or sorted(BACKENDS)
+    print('%-28s %-9s %-11s %9s %5s' % ('case', 'backend', 'status',
+                                          'time (s)', 'iters'))
+    for casefile in sorted(glob('cases/case*.m')):
+        problem = build_conic_problem(load_case(casefile))
+        for backend in backends:
+            try:
+                sol = solve_conic(problem, backend)
+            except ImportError:
+                continue
+            print('%-28s %-9s %-11s %9.4f %5d' % (
+                casefile, backend, sol.status, sol.solve_time,
+                sol.iterations))
@@ -0,0 +1,59 @@
+""" solves many cases at once in a pool of worker processes """
+from __future__ import division, print_function
+from collections import namedtuple
+from multiprocessing import Pool, cpu_count
+from jabr import solve_case
+from loadcase import Case, load_case
+from prescreen import ScreenedOut
+from verify import NotExact
+
+
+Outcome = namedtuple('Outcome', ['index', 'answer', 'error', 'tag'])
+
+
+def solve_item(job):
+    """ solves one (index, case, options) job in a worker. failures are
+    returned as the outcome's error message rather than raised, so one bad
+    case doesn't abort the batch """
+    index, case, options = job
+    try:
+        if isinstance(case, tuple):
+            case = load_case(case[0], scenario=case[1])
+        elif not isinstance(case, Case):
+            case = load_case(case)
+        answer = solve_case(case, **options)
+    except Exception as e:
+        tag = ('screened' if isinstance(e, ScreenedOut) else 'inexact' if
+               isinstance(e, NotExact) else 'failed')
+        return Outcome(index, None, '%s: %s' % (type(e).__name__, e), tag)
+    return Outcome(index, answer, None, 'solved')
+
+
+def solve_many(cases, workers=None, backend='gurobi', method='socp',
+               threads=None, screen=False, check=False):
+    """ solves cases (matpower casefiles, case stores, (store, scenario)
+    pairs, see casestore.py, or Case objects) in a pool of workers processes
+    and yields an Outcome for each one as soon as it finishes, so not in
+    input order. index is the case's position in cases, answer is as
+    returned by solve (None on failure) and error describes the failure.
+    tag is 'solved', 'failed', or 'screened' if screen is set and the
+    pre-screen (see prescreen.py) rejected the case before solving it, or
+    'inexact' if check is set and the solution failed it (see verify.py).
+
+    threads caps the solver threads per worker, by default so that workers
+    times threads doesn't exceed the number of cores
+    """
+    workers = workers or cpu_count()
+    if threads is None:
+        threads = max(1, cpu_count() // workers)
+    options = {'backend': backend, 'method': method, 'threads': threads,
+               'screen': screen, 'check': check}
+    jobs = ((i, case, options) for i, case in enumerate(cases))
+    pool = Pool(workers)
+    try:
+        for outcome in pool.imap_unordered(solve_item, jobs):
+            yield outcome
+        pool.close()
+    finally:
+        pool.terminate()
+        pool.join()
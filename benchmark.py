@@ -0,0 +1,145 @@
+""" scaling benchmark: solves random feeders (see synthetic.py) of growing
+size and times every stage of the solve separately, so a regression in any
+one of them shows up when the JSON output of two versions is compared.
+
+stages are load_case (parsing the matpower file), constraint_matrix (the
+balance equations, branch_constraint_matrix), model_build (the rest of the
+conic problem and the backend's model), optimize and recover (voltages and
+angles from the solution, recover_voltages). memory is the process's peak
+resident size after each stage, which unlike tracemalloc includes what the
+solvers allocate outside python. each case runs in a fresh process, so the
+peaks of one size don't carry over to the next
+
+    python benchmark.py --sizes 1000 10000 100000 --backend clarabel \\
+        --out bench.json
+"""
+from __future__ import division, print_function
+import json
+import os
+import platform
+import resource
+import subprocess
+import sys
+from multiprocessing import Pool
+from shutil import rmtree
+from tempfile import mkdtemp
+from time import time
+from backends import open_backend
+from jabr import (branch_constraint_matrix, build_conic_problem,
+                  recover_voltages)
+from loadcase import load_case, save_case
+from synthetic import random_feeder
+
+
+STAGES = ['load_case', 'constraint_matrix', 'model_build', 'optimize',
+          'recover']
+
+
+def peak_memory():
+    """ peak resident memory of this process so far, in bytes """
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak if sys.platform == 'darwin' else 1024*peak
+
+
+def bench_case(casefile, backend='gurobi', threads=0):
+    """ solves casefile one stage at a time and returns a dict with the
+    number of buses, the solver's status and iteration count, and for every
+    stage its wall time in seconds and the peak memory after it in bytes """
+    stages = {}
+    timer = [time()]
+
+    def done(stage):
+        now = time()
+        stages[stage] = {'seconds': now - timer[0],
+                         'peak_bytes': peak_memory()}
+        timer[0] = now
+
+    case = load_case(casefile)
+    done('load_case')
+    matrices = branch_constraint_matrix(case.n, case.f, case.t, case.g,
+                                        case.b)
+    done('constraint_matrix')
+    solver = open_backend(build_conic_problem(case, matrices), backend,
+                          threads)
+    if hasattr(solver, 'build'):
+        solver.build()  # clarabel would otherwise build inside solve
+    done('model_build')
+    solution = solver.solve()
+    done('optimize')
+    if solution.status == 'optimal':
+        recover_voltages(case, solution.x)
+    done('recover')
+    return {'n': case.n, 'status': solution.status,
+            'iterations': int(solution.iterations), 'stages': stages}
+
+
+def version():
+    """ the git commit of this tree, if it is a git checkout """
+    try:
+        return subprocess.check_output(
+            ['git', 'rev-parse', 'HEAD'], stderr=subprocess.STDOUT,
+            cwd=os.path.dirname(os.path.abspath(__file__))).decode().strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def run(sizes, backend='gurobi', branching=3, depth=None, seed=0,
+        threads=0, directory=None):
+    """ generates a random feeder of each size, saves it under directory (a
+    temporary one, removed afterwards, if not given) and benchmarks it with
+    bench_case in a process of its own. returns the whole report as a dict """
+    keep = directory is not None
+    directory = directory or mkdtemp(prefix='jabr-bench-')
+    results = []
+    try:
+        for n in sizes:
+            casefile = os.path.join(directory,
+                                    'case%d_random_%d.m' % (n, seed))
+            start = time()
+            save_case(random_feeder(n, branching, depth, seed), casefile)
+            generate = time() - start
+            pool = Pool(1)
+            try:
+                result = pool.apply(bench_case, (casefile, backend, threads))
+            finally:
+                pool.close()
+                pool.join()
+            result.update(casefile=casefile if keep else None,
+                          generate_seconds=generate, branching=branching,
+                          depth=depth, seed=seed)
+            results.append(result)
+    finally:
+        if not keep:
+            rmtree(directory)
+    return {'version': version(), 'backend': backend, 'threads': threads,
+            'python': platform.python_version(), 'machine': platform.machine(),
+            'stages': STAGES, 'results': results}
+
+
+if __name__ == '__main__':
+    from argparse import ArgumentParser
+    parser = ArgumentParser(description=__doc__.split('\n\n')[0])
+    parser.add_argument('--sizes', type=int, nargs='+',
+                        default=[1000, 10000, 100000])
+    parser.add_argument('--backend', default='gurobi')
+    parser.add_argument('--branching', type=int, default=3)
+    parser.add_argument('--depth', type=int, default=None)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--threads', type=int, default=0)
+    parser.add_argument('--keep', metavar='DIRECTORY', default=None,
+                        help='keep the generated cases in DIRECTORY')
+    parser.add_argument('--out', default=None,
+                        help='write the JSON report here instead of stdout')
+    args = parser.parse_args()
+    report = run(args.sizes, args.backend, args.branching, args.depth,
+                 args.seed, args.threads, args.keep)
+    for result in report['results']:
+        print('%8d %-13s' % (result['n'], result['status']) +
+              ' '.join('%s %.3fs' % (stage, result['stages'][stage]['seconds'])
+                       for stage in STAGES), file=sys.stderr)
+    text = json.dumps(report, indent=2, sort_keys=True)
+    if args.out:
+        with open(args.out, 'w') as out:
+            out.write(text + '\n')
+    else:
+        print(text)
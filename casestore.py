@@ -0,0 +1,126 @@
+""" a binary file format for cases that many worker processes can open at
+once without each holding its own copy.
+
+a store holds one case's branch arrays (f, t, g, b in a Case's own order),
+its adjacency matrix and external bus numbers, once, followed by any number
+of scenario demand vectors, a scenarios by bus array, for the same network.
+every array sits at an aligned offset in the file and is opened as a
+read-only numpy memory map, so the operating system keeps one copy of the
+pages in its cache however many processes read them, and opening a store
+costs nothing whatever the size of the case.
+
+CaseStore(storefile).case(k) (or load_case(storefile, scenario=k)) is a
+Case over those memory maps with scenario k's demands. its arrays can't be
+written to; code that changes demands assigns a new case.demand instead.
+pass workers the store's file name rather than a Case, which would be
+pickled and copied
+
+the file is the magic bytes, the version and the length of a JSON header
+(vhat, the generators, and every array's dtype, shape and offset), the
+header, then the arrays
+"""
+from __future__ import division, print_function
+import json
+import os
+import struct
+from numpy import asarray, atleast_2d, dtype, memmap, prod, zeros
+from scipy.sparse import csr_matrix
+from atomicwrite import atomic_write
+from loadcase import STORE_MAGIC, Case, Gen
+
+
+VERSION = 1
+ALIGN = 64
+PREFIX = struct.Struct('<IQ')  # version, header length
+
+
+def write_store(storefile, case, demands=None):
+    """ writes case to storefile with the scenario demands, a scenarios by
+    bus array of complex net demands (internal numbering), by default just
+    case.demand """
+    demands = atleast_2d(asarray(case.demand if demands is None else
+                                 demands, dtype=complex))
+    if demands.shape[1] != case.n:
+        raise ValueError("demands must have %d columns, one per bus" % case.n)
+    adjacency = case.adjacency.tocsr()
+    arrays = [('f', case.f), ('t', case.t), ('g', case.g), ('b', case.b),
+              ('ext', case.ext), ('indptr', adjacency.indptr),
+              ('indices', adjacency.indices), ('data', adjacency.data),
+              ('demands', demands)]
+    arrays = [(name, asarray(values)) for name, values in arrays]
+    layout, offset = {}, 0
+    for name, values in arrays:
+        layout[name] = [values.dtype.str, list(values.shape), offset]
+        offset += -(-values.nbytes // ALIGN)*ALIGN
+    header = json.dumps({
+        'vhat': float(case.vhat), 'arrays': layout,
+        'gens': [[bus, gen.p, gen.v] for bus, gen in sorted(
+            case.gens.items())]}).encode()
+    start = -(-(len(STORE_MAGIC) + PREFIX.size + len(header)) // ALIGN)*ALIGN
+    with atomic_write(storefile) as storefileobj:
+        storefileobj.write(STORE_MAGIC + PREFIX.pack(VERSION, len(header)) +
+                           header)
+        for name, values in arrays:
+            storefileobj.seek(start + layout[name][2])
+            storefileobj.write(values.tobytes())
+        storefileobj.truncate(start + offset)
+
+
+class CaseStore(object):
+    """ an open store: vhat, gens, the read-only scenarios by bus demands
+    memory map and the other arrays by name, see case """
+
+    def __init__(self, storefile):
+        with open(storefile, 'rb') as storefileobj:
+            if storefileobj.read(len(STORE_MAGIC)) != STORE_MAGIC:
+                raise ValueError("%s is not a case store" % storefile)
+            version, length = PREFIX.unpack(storefileobj.read(PREFIX.size))
+            if version != VERSION:
+                raise ValueError("%s is a version %d case store, expected %d"
+                                 % (storefile, version, VERSION))
+            header = json.loads(storefileobj.read(length).decode())
+        start = -(-(len(STORE_MAGIC) + PREFIX.size + length) // ALIGN)*ALIGN
+        size = os.path.getsize(storefile) - start
+        # one map of the whole file, every array a view into it
+        self.buffer = (memmap(storefile, 'u1', 'r', start) if size else
+                       zeros(0, 'u1'))
+        self.arrays = {}
+        for name, (kind, shape, offset) in header['arrays'].items():
+            kind = dtype(kind)
+            count = int(kind.itemsize*prod(shape))
+            self.arrays[name] = self.buffer[offset:offset + count].view(
+                kind).reshape(shape)
+        self.vhat = header['vhat']
+        self.gens = {bus: Gen(p, v) for bus, p, v in header['gens']}
+        self.demands = self.arrays['demands']
+        n = self.demands.shape[1]
+        self.adjacency = csr_matrix((self.arrays['data'],
+                                     self.arrays['indices'],
+                                     self.arrays['indptr']), shape=(n, n),
+                                    copy=False)
+
+    @property
+    def scenarios(self):
+        return len(self.demands)
+
+    def case(self, scenario=0):
+        """ a read-only Case over the store with the demands of scenario """
+        arrays = self.arrays
+        return Case.from_arrays(arrays['f'], arrays['t'], arrays['g'],
+                                arrays['b'], self.adjacency,
+                                self.demands[scenario], self.vhat,
+                                arrays['ext'], dict(self.gens))
+
+
+def open_store(storefile, scenario=0):
+    """ the read-only Case of scenario in storefile """
+    return CaseStore(storefile).case(scenario)
+
+
+if __name__ == '__main__':
+    import sys
+    from loadcase import load_case
+    if len(sys.argv) < 3:
+        print('usage: python casestore.py casefile storefile')
+        sys.exit(1)
+    write_store(sys.argv[2], load_case(sys.argv[1]))
@@ -0,0 +1,217 @@
+""" branch outage (N-1, N-k) studies on a radial network. removing branches
+splits the tree into islands; the islands with the root or a generator are
+solved, the rest are de-energized. islands are cut out of the parsed Case and
+their constraint matrices sliced out of the full case's, so nothing is
+re-parsed or rebuilt from scratch
+"""
+from __future__ import division, print_function
+from collections import namedtuple
+from multiprocessing import Pool, cpu_count
+from numpy import (array, asarray, arange, argsort, bincount, concatenate,
+                   full, isscalar, lexsort, minimum, maximum, nan, ones, zeros,
+                   flatnonzero, split, unique, where)
+from scipy.sparse import coo_matrix, diags
+from backends import solve_conic
+from jabr import (branch_constraint_matrix, build_conic_problem,
+                  recover_voltages)
+from loadcase import Case, Gen
+
+
+Island = namedtuple('Island', ['buses', 'V', 'theta', 'status'])
+Contingency = namedtuple('Contingency', ['index', 'outage', 'status',
+                                         'islands'])
+
+
+def island_labels(case, outage):
+    """ labels every bus with the top bus of its island once the outage
+    branches are removed (0 for the root's island) """
+    topology = case.topology
+    label = zeros(case.n, dtype=int)
+    cuts = topology.child[list(outage)]
+    for bus in cuts[argsort(topology.depth[cuts], kind='stable')]:
+        label[topology.subtree(bus)] = bus
+    return label
+
+
+def island_case(case, buses, branches, vhat=None):
+    """ cuts the island with buses (root first) and branches out of case.
+    returns the island's Case, with buses renumbered in that order and the
+    root's generator as its slack (or a slack at vhat, if given), and the
+    island's branches as indices into case's, in the island's branch order """
+    local = full(case.n, -1, dtype=int)
+    local[buses] = arange(len(buses))
+    f, t = local[case.f[branches]], local[case.t[branches]]
+    branches = branches[lexsort((maximum(f, t), minimum(f, t)))]
+    root = buses[0]
+    if vhat is None:
+        vhat = case.vhat if root == 0 else case.gens[root].v
+    gens = {int(local[bus]): gen for bus, gen in case.gens.items()
+            if local[bus] >= 0}
+    gens.setdefault(0, Gen(0, vhat))
+    island = Case(local[case.f[branches]], local[case.t[branches]],
+                  case.g[branches], case.b[branches], case.demand[buses],
+                  vhat, case.ext[buses], gens)
+    return island, branches
+
+
+def island_matrices(case, matrices, buses, branches, outage):
+    """ slices the island's (Areal, Areac) out of the full case's: keep the
+    island's rows and u, R, I columns, take the outage branches out of the
+    bus sums in the u columns, and flip the sign of I on branches whose
+    orientation changed with the renumbering """
+    Areal, Areac = matrices
+    n, m = case.n, len(case.f)
+    s2 = 2**.5
+    rows = buses[1:] - 1
+    cols = concatenate([buses, n + branches, n + m + branches])
+    local = full(n, -1, dtype=int)
+    local[buses] = arange(len(buses))
+    sign = ones(len(cols))
+    sign[len(buses) + len(branches):] = where(
+        local[case.f[branches]] < local[case.t[branches]], 1, -1)
+    outage = unique(asarray(outage, dtype=int))  # a branch is lost once
+    ends = concatenate([case.f[outage], case.t[outage]])
+    lost_g = bincount(ends, concatenate([case.g[outage]]*2), minlength=n)
+    lost_b = bincount(ends, concatenate([case.b[outage]]*2), minlength=n)
+    k = arange(len(rows))
+    shape = (len(rows), len(cols))
+    Ureal = coo_matrix((-s2*lost_g[buses[1:]], (k, k+1)), shape=shape)
+    Ureac = coo_matrix((s2*lost_b[buses[1:]], (k, k+1)), shape=shape)
+    S = diags(sign)
+    return ((Areal[rows][:, cols] + Ureal).dot(S).tocsr(),
+            (Areac[rows][:, cols] + Ureac).dot(S).tocsr())
+
+
+def contingency_islands(case, outage, matrices):
+    """ yields (island buses, Case, problem) for every energized island of
+    the outage, and (island buses, None, None) for the de-energized ones """
+    label = island_labels(case, outage)
+    order = argsort(label, kind='stable')
+    tops, starts = unique(label[order], return_index=True)
+    same = label[case.f] == label[case.t]
+    source = zeros(case.n, dtype=bool)
+    source[[0] + list(case.gens)] = True
+    for top, buses in zip(tops, split(order, starts[1:])):
+        sources = buses[source[buses]]
+        if not len(sources):
+            yield buses, None, None
+            continue
+        root = sources.min()
+        buses = concatenate([[root], buses[buses != root]])
+        branches = flatnonzero(same & (label[case.f] == top))
+        island, branches = island_case(case, buses, branches)
+        problem = None
+        if len(buses) > 1:
+            problem = build_conic_problem(island, island_matrices(
+                case, matrices, buses, branches, outage))
+        yield buses, island, problem
+
+
+WORKER = {}
+
+
+def start_worker(case, matrices, backend, threads):
+    """ pool initializer: the case and its constraint matrices, sent once
+    per worker rather than once per outage """
+    WORKER.update(case=case, matrices=matrices, backend=backend,
+                  threads=threads)
+
+
+def solve_island(island, problem, backend, threads):
+    """ voltages and angles of one island (None if not solved) and a status
+    """
+    if problem is None:
+        return array([island.vhat]), zeros(1), 'solved'
+    try:
+        solution = solve_conic(problem, backend, threads)
+        if solution.status != 'optimal':
+            return None, None, solution.status
+        V, theta = recover_voltages(island, solution.x)
+    except Exception as e:
+        return None, None, 'error: %s: %s' % (type(e).__name__, e)
+    return V, theta, 'solved'
+
+
+def solve_outage(job):
+    """ builds and solves the islands of one (index, outage) job with the
+    worker's case, returning its Contingency """
+    index, outage = job
+    case = WORKER['case']
+    islands = []
+    status = 'solved'
+    for buses, island, problem in contingency_islands(case, outage,
+                                                      WORKER['matrices']):
+        if island is None:
+            islands.append(Island(buses, zeros(len(buses)),
+                                  full(len(buses), nan), 'de-energized'))
+            continue
+        V, theta, island_status = solve_island(island, problem,
+                                               WORKER['backend'],
+                                               WORKER['threads'])
+        if V is None and status == 'solved':
+            status = island_status
+        islands.append(Island(buses, V, theta, island_status))
+    return Contingency(index, outage, status, islands)
+
+
+def iter_contingencies(case, outages=None, workers=None, backend='gurobi',
+                       threads=None, chunksize=16):
+    """ solves case with each outage removed and yields a Contingency for
+    each one as soon as it finishes, so not in order. an outage is a branch
+    index or a sequence of them (indices into case.branch_list); by default
+    every single branch outage. outages are sent to a pool of workers
+    processes (workers=1 solves them in this process) chunksize at a time,
+    and each worker cuts out and solves the islands of its own outages, so
+    the memory held here doesn't grow with the number of outages """
+    if outages is None:
+        outages = range(len(case.f))
+    jobs = enumerate((k,) if isscalar(k) else tuple(k) for k in outages)
+    matrices = branch_constraint_matrix(case.n, case.f, case.t, case.g, case.b)
+    workers = workers or cpu_count()
+    if threads is None:
+        threads = max(1, cpu_count() // workers)
+    if workers == 1:
+        start_worker(case, matrices, backend, threads)
+        try:
+            for job in jobs:
+                yield solve_outage(job)
+        finally:
+            WORKER.clear()
+        return
+    pool = Pool(workers, start_worker, (case, matrices, backend, threads))
+    try:
+        for contingency in pool.imap_unordered(solve_outage, jobs,
+                                               chunksize):
+            yield contingency
+        pool.close()
+    finally:
+        pool.terminate()
+        pool.join()
+
+
+def run_contingencies(case, outages=None, workers=None, backend='gurobi',
+                      threads=None):
+    """ the Contingency of every outage (see iter_contingencies), in the
+    order of outages.
+
+    a Contingency has the outage's position in outages, the outage as a
+    tuple of branches, its status: 'solved' if its energized islands all
+    solved, otherwise the status of a failing island (e.g. 'infeasible'),
+    and an Island per island: its buses (internal numbering) and their
+    voltages and angles, relative to the island's slack bus (the root, or
+    else its lowest numbered generator). de-energized islands have V = 0 and
+    theta NaN, islands that didn't solve V and theta None. voltages(c, n)
+    spreads one Contingency over every bus
+    """
+    return sorted(iter_contingencies(case, outages, workers, backend,
+                                     threads), key=lambda c: c.index)
+
+
+def voltages(contingency, n):
+    """ V and theta of contingency at all n buses, NaN where its island
+    didn't solve """
+    V, theta = full(n, nan), full(n, nan)
+    for island in contingency.islands:
+        if island.V is not None:
+            V[island.buses], theta[island.buses] = island.V, island.theta
+    return V, theta
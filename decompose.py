@@ -0,0 +1,253 @@
+""" solves large radial cases by cutting the tree into subtrees at a set of
+boundary branches and solving each subtree's Jabr SOCP in a worker process.
+
+every subtree below a boundary branch becomes a case of its own, rooted at a
+copy of the bus above the branch, whose voltage is the slack voltage; the
+subtree above sees the power flowing into the branch as extra demand at that
+bus. each round, every subtree is re-solved (in parallel) with the boundary
+voltages and flows of the previous round, until they stop changing. this is
+the backward/forward sweep of sweep.py one level up, with subtrees in place
+of buses, and like it converges in a few rounds plus one per level of
+subtrees. the workers keep their subtrees' JabrSolvers between rounds and
+only update the slack voltages and demands.
+
+the relaxation being exact for the whole case doesn't make it exact for
+every subtree: one that receives net generation from below (a negative
+demand) can go slack. so the subtrees' cones are checked at the end, and the
+result reported as 'inexact' if any is far from tight
+"""
+from __future__ import division, print_function
+from collections import namedtuple
+from multiprocessing import Pipe, Process, cpu_count
+from numpy import (add, abs as nabs, argsort, array, ceil, concatenate, conj,
+                   exp, flatnonzero, full, real, imag, unique, where, zeros)
+from contingency import island_case, island_labels
+from jabr import JabrSolver, recover_voltages
+from verify import cone_gap
+
+
+Subtree = namedtuple('Subtree', ['buses', 'case', 'inlet'])
+Decomposition = namedtuple('Decomposition', ['V', 'theta', 'status', 'rounds',
+                                             'change', 'gap', 'boundary'])
+
+
+def partition(case, parts):
+    """ picks boundary branches that cut case's tree into subtrees of about
+    n/parts buses each, greedily from the leaves up """
+    topology = case.topology
+    target = max(1, int(ceil(case.n/parts)))
+    below = zeros(case.n)
+    boundary = []
+    for tier in reversed(topology.levels[1:]):
+        size = 1 + below[tier]
+        cut = size >= target
+        boundary.append(topology.parent_branch[tier[cut]])
+        add.at(below, topology.parent[tier[~cut]], size[~cut])
+    return sorted(concatenate(boundary + [[]]).astype(int))
+
+
+def subtrees(case, boundary):
+    """ cuts case at the boundary branches into a Subtree per piece, parents
+    before children. buses are the piece's buses (internal numbering of case)
+    in its case's order: the root or, below a boundary branch, the bus above
+    it and then the piece's top bus first. inlet is that boundary branch, -1
+    for the root's piece """
+    topology = case.topology
+    boundary = array(boundary, dtype=int)
+    label = island_labels(case, boundary)
+    same = label[case.f] == label[case.t]
+    tops = unique(label)
+    result = []
+    for top in tops[argsort(topology.depth[tops], kind='stable')]:
+        buses = flatnonzero(label == top)
+        branches = flatnonzero(same & (label[case.f] == top))
+        inlet = -1
+        if top != 0:
+            inlet = topology.parent_branch[top]
+            buses = concatenate([[topology.parent[top], top],
+                                 buses[buses != top]])
+            branches = concatenate([branches, [inlet]]).astype(int)
+        piece, _ = island_case(case, buses, branches, vhat=case.vhat)
+        result.append(Subtree(buses, piece, inlet))
+    return result
+
+
+class SubtreeGroup(object):
+    """ the subtrees one worker is responsible for, each with a JabrSolver
+    kept open between rounds """
+
+    def __init__(self, cases, backend, threads):
+        self.cases = cases
+        self.solvers = [JabrSolver(piece, backend, threads) for piece in cases]
+
+    def solve(self, updates):
+        """ re-solves each subtree with its (slack voltage, demands) update,
+        returning a (status, V, theta, cone_gap) per subtree """
+        results = []
+        for piece, solver, (vhat, demand) in zip(self.cases, self.solvers,
+                                                 updates):
+            solver.update_slack_voltage(vhat)
+            solver.update_demands(real(demand), imag(demand))
+            solution = solver.optimize()
+            if solution.status != 'optimal':
+                results.append((solution.status, None, None, None))
+                continue
+            V, theta = recover_voltages(piece, solution.x)
+            results.append((solution.status, V, theta,
+                            cone_gap(piece, solution.x)))
+        return results
+
+
+def serve_group(conn, cases, backend, threads):
+    """ worker process loop: solve for each list of updates received, until
+    None is received """
+    group = SubtreeGroup(cases, backend, threads)
+    while True:
+        updates = conn.recv()
+        if updates is None:
+            break
+        conn.send(group.solve(updates))
+    conn.close()
+
+
+def decompose(case, boundary, workers=None, backend='gurobi', tol=1e-6,
+              max_rounds=100, threads=1, max_gap=1e-4, damping=1.):
+    """ solves case by subtrees cut at the boundary branches, spread round
+    robin over workers processes (workers=1 solves them all in this process),
+    until no boundary voltage magnitude or inlet flow (in the units of the
+    case's demands) changes by more than tol in a round. damping < 1 only
+    moves the boundary values that fraction of the way to each round's
+    result, which helps cases with generators.
+
+    returns a Decomposition with the voltage magnitudes and angles of every
+    bus (internal numbering), status 'optimal', 'max_rounds', 'inexact' (some
+    subtree's cone_gap is over max_gap) or the status of a subtree that
+    failed, the number of rounds, the last round's change and the largest
+    cone_gap of the last round
+    """
+    if max_rounds < 1:
+        raise ValueError("max_rounds must be at least 1, not %r" % max_rounds)
+    pieces = subtrees(case, boundary)
+    workers = min(workers or cpu_count(), len(pieces))
+    groups = [list(range(i, len(pieces), workers)) for i in range(workers)]
+    topology = case.topology
+    inlets = array([piece.inlet for piece in pieces[1:]], dtype=int)
+    above = topology.parent[topology.child[inlets]]
+    # start from a flat voltage profile and the inlets' downstream demand,
+    # without the reactive part where a generator can supply it
+    V_above = full(len(inlets), float(case.vhat))
+    flow = topology.subtree_sum(case.demand)[topology.child[inlets]]
+    gens = zeros(case.n)
+    gens[[bus for bus in case.gens if bus != 0]] = 1
+    flow = where(topology.subtree_sum(gens)[topology.child[inlets]] > 0,
+                 real(flow), flow)
+    V = zeros(case.n)
+    theta = zeros(case.n)
+    status, change = 'max_rounds', float('inf')
+
+    pipes = []
+    local = None
+    if workers == 1:
+        local = SubtreeGroup([piece.case for piece in pieces], backend,
+                             threads)
+    else:
+        for group in groups:
+            conn, child = Pipe()
+            worker = Process(target=serve_group, args=(
+                child, [pieces[i].case for i in group], backend, threads))
+            worker.daemon = True
+            worker.start()
+            pipes.append((conn, worker))
+    try:
+        for rounds in range(1, max_rounds + 1):
+            extra = zeros(case.n, dtype=complex)
+            add.at(extra, above, flow)
+            updates = [(V_above[i-1] if i else case.vhat,
+                        case.demand[piece.buses] + extra[piece.buses])
+                       for i, piece in enumerate(pieces)]
+            if local is not None:
+                results = local.solve(updates)
+            else:
+                for (conn, _), group in zip(pipes, groups):
+                    conn.send([updates[i] for i in group])
+                results = [None]*len(pieces)
+                for (conn, _), group in zip(pipes, groups):
+                    for i, result in zip(group, conn.recv()):
+                        results[i] = result
+            failed = [s for s, _, _, _ in results if s != 'optimal']
+            if failed:
+                status = failed[0]
+                break
+            # parents come first, so each piece's slack angle is known
+            new_flow = zeros(len(inlets), dtype=complex)
+            for i, (piece, (_, V_piece, theta_piece, _)) in enumerate(
+                    zip(pieces, results)):
+                if i == 0:
+                    V[piece.buses], theta[piece.buses] = V_piece, theta_piece
+                    continue
+                own = piece.buses[1:]
+                V[own] = V_piece[1:]
+                theta[own] = theta_piece[1:] + theta[piece.buses[0]]
+                # the power flowing from the slack into the inlet branch
+                k = piece.inlet
+                E = V_piece[:2]*exp(1j*theta_piece[:2])
+                new_flow[i-1] = E[0]*conj((case.g[k] + 1j*case.b[k]) *
+                                          (E[0] - E[1]))
+            change = max([0.] + list(nabs(V[above] - V_above)) +
+                         list(nabs(new_flow - flow)))
+            V_above = V_above + damping*(V[above] - V_above)
+            flow = flow + damping*(new_flow - flow)
+            if change < tol:
+                status = 'optimal'
+                break
+    finally:
+        for conn, worker in pipes:
+            conn.send(None)
+            worker.join()
+    gap = max(result[3] for result in results) if not failed else None
+    if status == 'optimal' and gap > max_gap:
+        status = 'inexact'
+    return Decomposition(V, theta, status, rounds, change, gap,
+                         list(boundary))
+
+
+def solve_decomposed(case, parts=None, boundary=None, workers=None,
+                     backend='gurobi', tol=1e-6, max_rounds=100, damping=1.):
+    """ like jabr.solve_case, but solves the case by subtrees (see
+    decompose), cut at the boundary branches or else into parts subtrees (by
+    default one per worker). raises ValueError if it doesn't converge """
+    workers = workers or cpu_count()
+    if boundary is None:
+        boundary = partition(case, parts or workers)
+    result = decompose(case, boundary, workers, backend, tol, max_rounds,
+                       damping=damping)
+    if result.status != 'optimal':
+        raise ValueError("decomposition failed to converge: %s after %d rounds"
+                         % (result.status, result.rounds))
+    i2e = case.i2e
+    return {i2e[i]: (v, t) for (i, (v, t)) in
+            enumerate(zip(result.V, result.theta))}
+
+
+if __name__ == '__main__':
+    import sys
+    from time import time
+    from jabr import build_gurobi_model
+    from loadcase import load_case
+    casefile = sys.argv[1] if len(sys.argv) > 1 else 'cases/case118_v2.m'
+    backend = sys.argv[2] if len(sys.argv) > 2 else 'gurobi'
+    case = load_case(casefile)
+    start = time()
+    u, _, _ = build_gurobi_model(case)
+    mono = time() - start
+    V_mono = (2**.5*array(u))**.5
+    print('%-22s %8.3fs' % ('monolithic gurobi', mono))
+    for parts in (2, 4, 8, 16, 32):
+        boundary = partition(case, parts)
+        start = time()
+        result = decompose(case, boundary, parts, backend)
+        elapsed = time() - start
+        print('%-22s %8.3fs %3d rounds %-10s max |V - V_mono| %.1e '
+              'speed-up %.2f' % ('%d subtrees' % (len(boundary) + 1), elapsed,
+                                 result.rounds, result.status,
+                                 nabs(result.V - V_mono).max(), mono/elapsed))
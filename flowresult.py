@@ -0,0 +1,79 @@
+""" solve results as arrays, see solve(..., arrays=True), instead of the
+dictionary of external bus number to (V, theta) tuples that solve returns
+by default
+"""
+from __future__ import division, print_function
+from numpy import (asarray, column_stack, conj, cos, exp, imag, load as
+                   load_npz, real, savez, savetxt, sin, sqrt)
+
+
+class FlowResult(object):
+    """ a solved power flow, one array entry per bus (internal numbering,
+    i2e gives the external numbers) or per branch (f to t, as in the Case):
+
+    V, theta: voltage magnitudes and angles (radians)
+    u, R, I: the Jabr variables, u = V^2/sqrt(2), R + jI =
+        V[f]*V[t]*exp(j*(theta[f] - theta[t])). views of the SOCP solution
+        if there was one, else computed from V and theta
+    S_from, S_to: complex power flowing out of f and t into each branch
+    """
+    __slots__ = ('V', 'theta', 'u', 'R', 'I', 'S_from', 'S_to', 'i2e', 'f',
+                 't')
+
+    def __init__(self, V, theta, u, R, I, S_from, S_to, i2e, f, t):
+        self.V, self.theta = V, theta
+        self.u, self.R, self.I = u, R, I
+        self.S_from, self.S_to = S_from, S_to
+        self.i2e, self.f, self.t = i2e, f, t
+
+    @classmethod
+    def from_solution(cls, case, V, theta, x=None):
+        """ the FlowResult of case at voltages V, theta (internal numbering),
+        with u, R and I sliced out of the stacked SOCP solution x if given
+        """
+        n, m = case.n, len(case.f)
+        f, t = case.f, case.t
+        V, theta = asarray(V), asarray(theta)
+        if x is not None:
+            u, R, I = x[:n], x[n:n+m], x[n+m:]
+        else:
+            u = V*V/sqrt(2)
+            VV, delta = V[f]*V[t], theta[f] - theta[t]
+            R, I = VV*cos(delta), VV*sin(delta)
+        E = V*exp(1j*theta)
+        current = (case.g + 1j*case.b)*(E[f] - E[t])
+        return cls(V, theta, u, R, I, E[f]*conj(current), -E[t]*conj(current),
+                   case.ext, f, t)
+
+    @property
+    def n(self):
+        return len(self.V)
+
+    def to_dict(self):
+        """ the answer as solve returns it by default """
+        return dict(zip(self.i2e.tolist(), zip(self.V.tolist(),
+                                               self.theta.tolist())))
+
+    def save_npz(self, npzfile):
+        """ saves every array to npzfile, see load """
+        savez(npzfile, **{name: getattr(self, name)
+                          for name in self.__slots__})
+
+    @classmethod
+    def load(cls, npzfile):
+        """ reads back a FlowResult written by save_npz """
+        with load_npz(npzfile) as saved:
+            return cls(*[saved[name] for name in cls.__slots__])
+
+    def save_csv(self, busfile, branchfile):
+        """ writes a row per bus (external number, V, theta, u) to busfile
+        and a row per branch (external from and to buses, R, I and the
+        real and reactive flows at both ends) to branchfile """
+        savetxt(busfile, column_stack([self.i2e, self.V, self.theta, self.u]),
+                fmt=['%d', '%.17g', '%.17g', '%.17g'], delimiter=',',
+                header='bus,V,theta,u', comments='')
+        savetxt(branchfile, column_stack([
+            self.i2e[self.f], self.i2e[self.t], self.R, self.I,
+            real(self.S_from), imag(self.S_from), real(self.S_to),
+            imag(self.S_to)]), fmt=['%d', '%d'] + ['%.17g']*6, delimiter=',',
+            header='from,to,R,I,P_from,Q_from,P_to,Q_to', comments='')
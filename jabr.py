@@ -1,61 +1,109 @@
 from __future__ import division, print_function
-from gurobipy import Model as GurobiModel, GRB, quicksum
-from numpy import array, sqrt, real, imag, pi
+try:
+    from gurobipy import Model as GurobiModel, GRB, quicksum
+except ImportError:  # the open-source backends in backends.py still work
+    GurobiModel = GRB = quicksum = None
+from numpy import (array, asarray, sqrt, real, imag, pi, arange, ones,
+                   concatenate, lexsort, zeros, bincount, arcsin, clip,
+                   where, atleast_1d, diff, full, repeat, unique,
+                   flatnonzero, abs as nabs)
 from math import asin
-from scipy.sparse import dok_matrix, hstack
+from scipy.sparse import coo_matrix, hstack, vstack, triu
 from collections import defaultdict, deque
-from loadcase import load_case
+from loadcase import load_case, z2y
+from backends import ConicProblem, open_backend, solve_conic
+from sweep import sweep_voltages
+from prescreen import screen as prescreen, ScreenedOut
+from solvestats import SolveStats, report
+from verify import NotExact, verify
+from flowresult import FlowResult
 
 
-def build_U_matrices(G, B):
-    S2 = sqrt(2)
-    n = G.shape[0]
-    Ureal = dok_matrix((n-1, n))
-    Ureac = dok_matrix((n-1, n))
+def branch_arrays(G, B):
+    """ returns from bus, to bus, conductance and susceptance arrays with one
+    entry per branch, in the same (sorted, fbus < tbus) order as branch_list
+    """
+    upper = triu(B, k=1, format='coo')
+    order = lexsort((upper.col, upper.row))
+    f, t = upper.row[order], upper.col[order]
+    g = asarray(G.tocsr()[f, t]).ravel()
+    b = upper.data[order]
+    return f, t, g, b
+
+
+def branch_endpoints(f, t):
+    """ rows (bus-1), columns (branch) and signs for both ends of every branch,
+    skipping the root. the sign is -1 at the lower numbered end, 1 otherwise
+    """
+    m = len(f)
+    k = arange(m)
+    bus = concatenate([f, t])
+    branch = concatenate([k, k])
+    sign = concatenate([-ones(m), ones(m)])
+    keep = bus != 0
+    return bus[keep]-1, branch[keep], sign[keep]
+
+
+def branch_U_matrices(n, f, t, g, b):
     S2 = 2**.5
-    for i in range(1, n):
-        Ureal[i-1, i] = S2*G[i, :].sum()
-        Ureac[i-1, i] = -S2*B[i, :].sum()
+    rows = arange(n-1)
+    ends = concatenate([f, t])
+    Greal = S2*bincount(ends, concatenate([g, g]), minlength=n)[1:]
+    Breac = -S2*bincount(ends, concatenate([b, b]), minlength=n)[1:]
+    Ureal = coo_matrix((Greal, (rows, rows+1)), shape=(n-1, n))
+    Ureac = coo_matrix((Breac, (rows, rows+1)), shape=(n-1, n))
     return Ureal, Ureac
 
 
-def build_R_matrices(G, B, branch_map):
-    """ rows are buses 2 to n; cols are branches  """
-    n = G.shape[0]
-    Rreal = dok_matrix((n-1, n-1))
-    Rreac = dok_matrix((n-1, n-1))
-    for fbus in range(1, n):
-        for tbus in B[fbus, :].nonzero()[1]:
-            branch = branch_map[(fbus, tbus)]
-            Rreal[fbus-1, branch] = -G[fbus, tbus]
-            Rreac[fbus-1, branch] = B[fbus, tbus]
+def branch_R_matrices(n, f, t, g, b):
+    rows, cols, _ = branch_endpoints(f, t)
+    Rreal = coo_matrix((-g[cols], (rows, cols)), shape=(n-1, n-1))
+    Rreac = coo_matrix((b[cols], (rows, cols)), shape=(n-1, n-1))
     return Rreal, Rreac
 
 
-def build_I_matrices(G, B, branch_map):
-    """ rows are buses 2 to n; cols are branches  """
-    n = B.shape[0]
-    Ireal = dok_matrix((n-1, n-1))
-    Ireac = dok_matrix((n-1, n-1))
-    for fbus in range(1, n):
-        for tbus in B[fbus, :].nonzero()[1]:
-            branch = branch_map[(fbus, tbus)]
-            s = -1 if fbus < tbus else 1
-            Ireal[fbus-1, branch] = s*B[fbus, tbus]
-            Ireac[fbus-1, branch] = s*G[fbus, tbus]
+def branch_I_matrices(n, f, t, g, b):
+    rows, cols, s = branch_endpoints(f, t)
+    Ireal = coo_matrix((s*b[cols], (rows, cols)), shape=(n-1, n-1))
+    Ireac = coo_matrix((s*g[cols], (rows, cols)), shape=(n-1, n-1))
     return Ireal, Ireac
 
 
-def build_constraint_matrix(G, B, branch_map):
-    Ureal, Ureac = build_U_matrices(G, B)
-    Rreal, Rreac = build_R_matrices(G, B, branch_map)
-    Ireal, Ireac = build_I_matrices(G, B, branch_map)
-    Areal = hstack([Ureal, Rreal, Ireal])
-    Areac = hstack([Ureac, Rreac, Ireac])
+def branch_constraint_matrix(n, f, t, g, b):
+    """ build_constraint_matrix from the branch arrays of a Case """
+    Ureal, Ureac = branch_U_matrices(n, f, t, g, b)
+    Rreal, Rreac = branch_R_matrices(n, f, t, g, b)
+    Ireal, Ireac = branch_I_matrices(n, f, t, g, b)
+    Areal = hstack([Ureal, Rreal, Ireal], format='csr')
+    Areac = hstack([Ureac, Rreac, Ireac], format='csr')
     return Areal, Areac
 
 
-def build_gurobi_model(case):
+def build_U_matrices(G, B):
+    return branch_U_matrices(G.shape[0], *branch_arrays(G, B))
+
+
+def build_R_matrices(G, B, branch_map=None):
+    """ rows are buses 2 to n; cols are branches  """
+    return branch_R_matrices(G.shape[0], *branch_arrays(G, B))
+
+
+def build_I_matrices(G, B, branch_map=None):
+    """ rows are buses 2 to n; cols are branches  """
+    return branch_I_matrices(B.shape[0], *branch_arrays(G, B))
+
+
+def build_constraint_matrix(G, B, branch_map=None):
+    """ returns the real and reactive power balance matrices in CSR form.
+    columns are u (n), then R and I (one per branch, branch_list order).
+
+    branch_map is accepted for compatibility; the branch order is recovered
+    from the sparsity pattern of B, which is the same sorted order
+    """
+    return branch_constraint_matrix(G.shape[0], *branch_arrays(G, B))
+
+
+def build_gurobi_model(case, tol=None):
     G, B = case.G, case.B
     P = real(case.demands)
     Q = imag(case.demands)
@@ -75,7 +123,7 @@ def build_gurobi_model(case):
         I[j, i] = I[i, j]
     m.update()
     m.addConstr(u[0] == vhat*vhat/s2, 'u0')
-    for gen, v in gens.iteritems():
+    for gen, v in gens.items():
         m.addConstr(u[gen] == v*v/s2, 'u%d' % gen)
     for i, j in branches:
         m.addQConstr(2*u[i]*u[j] >= R[i,j]*R[i,j] + I[i,j]*I[i,j], 'cone_%d_%d' % (i, j))
@@ -90,7 +138,8 @@ def build_gurobi_model(case):
                     'reac_flow_%d_%d' % (i, j))
     m.setObjective(quicksum(R[i,j] for i, j in branches), sense=GRB.MAXIMIZE)
     m.params.outputFlag = 0
-    #m.params.barQCPConvTol = 5e-10
+    if tol is not None:
+        m.params.barQCPConvTol = tol
     m.optimize()
     if m.status != 2:
         raise ValueError("gurobi failed to converge: %s (check log)" % m.status)
@@ -100,6 +149,177 @@ def build_gurobi_model(case):
     return u_opt, R_opt, I_opt
 
 
+def fixed_voltages(case):
+    """ returns the buses with a fixed voltage (the root, then the other
+    generators), their voltages, and the buses with a reactive power balance
+    equation (every other bus). internal numbering """
+    gens = sorted(bus for bus in case.gens if bus != 0)
+    fixed = array([0] + gens)
+    v = array([case.vhat] + [case.gens[bus].v for bus in gens])
+    reac = array([i for i in range(1, case.n) if i not in case.gens],
+                 dtype=int)
+    return fixed, v, reac
+
+
+def unpack_variables(x, branches):
+    """ splits a stacked [u, R, I] vector into the u list and the R and I
+    dictionaries returned by build_gurobi_model """
+    m = len(branches)
+    n = len(x) - 2*m
+    R, I = x[n:n+m], x[n+m:]
+    R_opt = dict(zip(branches, R))
+    I_opt = dict(zip(branches, I))
+    R_opt.update(((j, i), r) for (i, j), r in zip(branches, R))
+    I_opt.update(((j, i), y) for (i, j), y in zip(branches, I))
+    return list(x[:n]), R_opt, I_opt
+
+
+def build_conic_problem(case, matrices=None):
+    """ returns the Jabr SOCP in the standard conic form of backends.py, with
+    variables [u, R, I] as in build_constraint_matrix. rows are the fixed
+    voltages, the real and reactive balance equations, R >= 0, and for each
+    branch the rotated cone 2*u[i]*u[j] >= R^2 + I^2 written as
+    ||(sqrt(2)*R, sqrt(2)*I, u[i] - u[j])|| <= u[i] + u[j]
+
+    matrices, if given, are the case's (Areal, Areac), e.g. sliced out of a
+    larger case's (see contingency.py)
+    """
+    P = real(case.demand)
+    Q = imag(case.demand)
+    n = case.n
+    m = n - 1
+    N = n + 2*m
+    s2 = 2**.5
+    f, t = case.f, case.t
+    if matrices is None:
+        matrices = branch_constraint_matrix(n, f, t, case.g, case.b)
+    Areal, Areac = matrices
+    fixed, v, reac = fixed_voltages(case)
+    k = arange(m)
+    U = coo_matrix((ones(len(fixed)), (arange(len(fixed)), fixed)),
+                   shape=(len(fixed), N))
+    Rpos = coo_matrix((-ones(m), (k, n+k)), shape=(m, N))
+    rows = concatenate([4*k, 4*k, 4*k+1, 4*k+2, 4*k+3, 4*k+3])
+    cols = concatenate([f, t, n+k, n+m+k, f, t])
+    vals = concatenate([-ones(2*m), -s2*ones(2*m), -ones(m), ones(m)])
+    cones = coo_matrix((vals, (rows, cols)), shape=(4*m, N))
+    A = vstack([U, Areal, Areac[reac-1], Rpos, cones], format='csc')
+    b = concatenate([v*v/s2, -P[1:], -Q[reac], zeros(5*m)])
+    c = concatenate([zeros(n), -ones(m), zeros(m)])
+    zero = len(fixed) + m + len(reac)
+    return ConicProblem(c, A, b, zero, m, [4]*m)
+
+
+def solve_jabr(case, backend='gurobi', threads=0):
+    """ solves the Jabr SOCP for case with the named backend (see backends.py)
+    and returns u, R and I as build_gurobi_model does, plus the ConicSolution
+    with the backend's status, solve time and iteration count """
+    solution = solve_conic(build_conic_problem(case), backend, threads)
+    if solution.status != 'optimal':
+        raise ValueError("%s failed to converge: %s" %
+                         (backend, solution.status))
+    u, R, I = unpack_variables(solution.x, case.branch_list)
+    return u, R, I, solution
+
+
+class JabrSolver(object):
+    """ builds the Jabr SOCP for a case once, so it can be re-solved after
+    changing only the demands, the slack voltage or a few branch impedances.
+    only the right-hand sides of the u0, real_flow and reac_flow rows change,
+    or the coefficients of the changed branches; the backend warm starts
+    from the previous solution if it can (see backends.py). tol is the
+    backend's tolerance, None for its default, and duals=True asks the
+    backend for the duals of each solve """
+
+    def __init__(self, case, backend='gurobi', threads=0, tol=None,
+                 duals=False):
+        self.case = case
+        self.backend = backend
+        self.fixed, _, self.reac = fixed_voltages(case)
+        self.reac_row = full(case.n, -1, dtype=int)
+        self.reac_row[self.reac] = arange(len(self.reac))
+        self.g = self.b = None  # the case's, until update_branches
+        self.backend_solver = open_backend(build_conic_problem(case), backend,
+                                           threads, tol, duals)
+
+    def update_demands(self, P, Q):
+        """ P and Q are the real and reactive net demands at every bus,
+        internal numbering, as in case.demands """
+        P, Q = asarray(P, dtype=float), asarray(Q, dtype=float)
+        start = len(self.fixed)
+        values = concatenate([-P[1:], -Q[self.reac]])
+        self.backend_solver.update_b(arange(start, start + len(values)),
+                                     values)
+
+    def update_slack_voltage(self, vhat):
+        self.backend_solver.update_b([0], [vhat*vhat/2**.5])
+
+    def update_branch(self, k, r, x):
+        """ changes the impedance of branch k to r + jx, see update_branches
+        """
+        self.update_branches([k], [r], [x])
+
+    def update_branches(self, branches, r, x):
+        """ changes the impedances of branches (indices into case.f and
+        case.t) to r + jx, in place: only the balance rows of their end
+        buses change, in the branches' own R and I columns and in the u
+        column, whose coefficient sums g (or b) over every branch at the bus.
+        as with update_demands, the case itself is left as it is; self.g and
+        self.b are the admittances the model now has """
+        case = self.case
+        if self.g is None:
+            self.g = array(case.g, dtype=float)
+            self.b = array(case.b, dtype=float)
+        k = atleast_1d(asarray(branches, dtype=int))
+        self.g[k], self.b[k] = z2y(asarray(r, dtype=float),
+                                   asarray(x, dtype=float))
+        k = unique(k)
+        n, m = case.n, len(case.f)
+        real_row = len(self.fixed) - 1  # + bus
+        reac_row = len(self.fixed) + m  # + self.reac_row[bus]
+        s2 = 2**.5
+        buses = unique(concatenate([case.f[k], case.t[k]]))
+        buses = buses[buses != 0]
+        at = case.adjacency[buses]
+        owner = repeat(arange(len(buses)), diff(at.indptr))
+        # summed in the order branch_U_matrices sums them (branches from the
+        # bus, then to it), so the coefficients match a fresh build exactly
+        order = lexsort((at.indices, at.indices < buses[owner], owner))
+        owner, at = owner[order], at.data[order] - 1
+        g_sum = bincount(owner, self.g[at], len(buses))
+        b_sum = bincount(owner, self.b[at], len(buses))
+        reac = self.reac_row[buses] >= 0
+        rows = [real_row + buses, reac_row + self.reac_row[buses[reac]]]
+        cols = [buses, buses[reac]]
+        values = [s2*g_sum, -s2*b_sum[reac]]
+        g, b = self.g[k], self.b[k]
+        for ends, sign in ((case.f[k], -1), (case.t[k], 1)):
+            keep = ends != 0
+            bus, R, I = ends[keep], n + k[keep], n + m + k[keep]
+            rows += [real_row + bus]*2
+            cols += [R, I]
+            values += [-g[keep], sign*b[keep]]
+            reac = self.reac_row[bus] >= 0
+            rows += [reac_row + self.reac_row[bus[reac]]]*2
+            cols += [R[reac], I[reac]]
+            values += [b[keep][reac], sign*g[keep][reac]]
+        self.backend_solver.update_A(concatenate(rows), concatenate(cols),
+                                     concatenate(values))
+
+    def optimize(self):
+        """ solves and returns the ConicSolution, whatever its status """
+        return self.backend_solver.solve()
+
+    def solve(self):
+        """ returns u, R, I and the ConicSolution, as solve_jabr does """
+        solution = self.optimize()
+        if solution.status != 'optimal':
+            raise ValueError("%s failed to converge: %s" %
+                             (self.backend, solution.status))
+        u, R, I = unpack_variables(solution.x, self.case.branch_list)
+        return u, R, I, solution
+
+
 def recover_original_variables(u, I):
     """ given Jabr variables u and I, return bus voltages and angles """
     V = sqrt(sqrt(2) * array(u))
@@ -108,6 +328,34 @@ def recover_original_variables(u, I):
     return V, theta_bus
 
 
+def recover_voltages(case, x, tol=1e-6):
+    """ vectorized recover_original_variables: given the stacked [u, R, I]
+    solution vector, returns bus voltages and angles as arrays. branch angle
+    differences are summed down the tree with case.topology.
+
+    a solution within its cones has |I| <= V[f]*V[t]. sines that rounding
+    puts up to tol past +-1 are clipped; anything further means the solver's
+    u and I are inconsistent, and ValueError is raised rather than a wrong
+    angle returned """
+    n = case.n
+    f, t = case.f, case.t
+    V = sqrt(sqrt(2) * asarray(x[:n]))
+    I = asarray(x[2*n-1:])
+    sines = I/(V[f]*V[t])
+    outside = flatnonzero(~(nabs(sines) <= 1 + tol))
+    if len(outside):
+        k = outside[0]
+        raise ValueError("branch %d (%d, %d) is outside its cone: the sine of "
+                         "its angle difference is %g" % (
+                             k, case.i2e[f[k]], case.i2e[t[k]], sines[k]))
+    theta_branch = arcsin(clip(sines, -1, 1))
+    topology = case.topology
+    delta = zeros(n)
+    delta[topology.child] = where(topology.child == t, -theta_branch,
+                                  theta_branch)
+    return V, topology.path_sum(delta)
+
+
 def recover_bus_angles(theta_branch):
     """ assumes 0 is the root. traverses the tree and converts branch voltage
         angles to bus voltage angles """
@@ -130,17 +378,178 @@ def recover_bus_angles(theta_branch):
     return theta_bus
 
 
-def solve(casefile):
+class Infeasible(ValueError):
+    """ raised by solve_case when the backend finds the SOCP infeasible.
+    dual is the backend's certificate of infeasibility (A'z = 0, b'z < 0, z
+    in the dual cone, see backends.py), None if it gave none: ask for one
+    with certificate=True. gurobi gives none for SOCPs """
+
+    def __init__(self, backend, dual):
+        ValueError.__init__(self, "%s failed to converge: infeasible" %
+                            backend)
+        self.dual = dual
+
+
+def solve_case(case, backend='gurobi', method='socp', certificate=False,
+               threads=0, screen=False, stats=False, hook=None, cache=None,
+               arrays=False, check=False, accuracy=None):
+    """ like solve, but takes a Case from load_case. threads caps the
+    backend's thread count (0 lets it choose). stats can also be a SolveStats
+    to add the stages to """
+    if method not in ('socp', 'sweep'):
+        raise ValueError("unknown method %r, use 'socp' or 'sweep'" % method)
+    record = stats if isinstance(stats, SolveStats) else SolveStats(method,
+                                                                    backend)
+    record.n = case.n
+    try:
+        answer = result = None
+        if cache is not None:
+            with record.stage('cache'):
+                key = cache.key(case, backend, method, certificate, screen,
+                                accuracy, check)
+                answer = cache.get(key)
+            if answer is not None:
+                record.status = 'cached'
+        if answer is None:
+            result = solve_recorded(case, backend, method, certificate,
+                                    threads, screen, record, accuracy)
+            if check:
+                with record.stage('verify'):
+                    verification = verify(case, result)
+                record.record_verification(verification)
+                if not verification.exact:
+                    raise NotExact(verification, result)
+            if cache is not None or not arrays:
+                answer = result.to_dict()
+            if cache is not None:
+                cache.put(key, answer)
+        elif arrays:
+            V, theta = zip(*[answer[bus] for bus in case.i2e])
+            result = FlowResult.from_solution(case, V, theta)
+    finally:
+        report(record, hook)
+    if arrays:
+        answer = result
+    return (answer, record) if stats else answer
+
+
+def solve_recorded(case, backend, method, certificate, threads, screen,
+                   record, accuracy=None):
+    """ solve_case, timing each stage in the SolveStats record. returns a
+    FlowResult """
+    if screen:
+        with record.stage('screen'):
+            result = prescreen(case)
+        if result.infeasible:
+            record.status = 'screened'
+            raise ScreenedOut(result)
+    if method == 'sweep' and not certificate and list(case.gens) == [0]:
+        with record.stage('sweep'):
+            V, theta = sweep_voltages(case.f, case.t, case.g, case.b,
+                                      case.demand, case.vhat,
+                                      topology=case.topology)
+        if V is not None:
+            record.status = 'converged'
+            return FlowResult.from_solution(case, V, theta)
+    with record.stage('constraint_matrix'):
+        matrices = branch_constraint_matrix(case.n, case.f, case.t, case.g,
+                                            case.b)
+    with record.stage('model_build'):
+        problem = build_conic_problem(case, matrices)
+        solver = open_backend(problem, backend, threads,
+                              accuracy.loose_tol if accuracy else None,
+                              duals=certificate)
+        if hasattr(solver, 'build'):
+            solver.build()  # clarabel would otherwise build inside solve
+    record.record_problem(problem)
+    with record.stage('optimize'):
+        solution = solver.solve()
+    result = None
+    if accuracy is not None:
+        with record.stage('triage'):
+            if solution.status == 'optimal':
+                try:
+                    result = recover_result(case, solution)
+                except ValueError:
+                    pass  # outside its cones, so triage finds it suspicious
+            verdict = accuracy.triage(case, solution, result)
+        accuracy.count(verdict)
+        record.phase = 'loose'
+        if verdict != 'settled':
+            record.phase, result = 'tight', None
+            solver.set_tol(accuracy.tight_tol)
+            with record.stage('refine'):
+                solution = solver.solve()
+    record.record_solution(problem, solution)
+    if solution.status == 'infeasible':
+        raise Infeasible(backend, solution.dual)
+    if solution.status != 'optimal':
+        raise ValueError("%s failed to converge: %s" %
+                         (backend, solution.status))
+    if result is None:
+        with record.stage('recover'):
+            result = recover_result(case, solution)
+    return result
+
+
+def recover_result(case, solution):
+    """ the FlowResult of an optimal ConicSolution """
+    V, theta = recover_voltages(case, solution.x)
+    return FlowResult.from_solution(case, V, theta, solution.x)
+
+
+def solve(casefile, backend='gurobi', method='socp', certificate=False,
+          screen=False, stats=False, hook=None, cache=None, arrays=False,
+          check=False, accuracy=None):
     """ given a matpower casefile, solves the power flow using the Jabr method
         and returns a dictionary mapping bus number to
-        (voltage magnitude, voltage angle) tuples. angles are in radians
+        (voltage magnitude, voltage angle) tuples. angles are in radians.
+        backend names the conic solver, see backends.BACKENDS
+
+        method='sweep' first tries a backward/forward sweep (see sweep.py),
+        falling back to the SOCP if the case has generators other than the
+        root, if the sweep diverges, or if certificate is set, i.e. the caller
+        wants infeasibility proven rather than inferred from divergence.
+        certificate=True also asks the backend for its duals: an infeasible
+        case raises Infeasible (a ValueError) with the certificate of
+        infeasibility as its dual, and an optimal one's dual residual is in
+        the SolveStats
+
+        screen=True first runs the O(n) checks in prescreen.py and raises
+        ScreenedOut (a ValueError) without building the SOCP if they fail
+
+        stats=True returns (answer, SolveStats) instead, with the time spent
+        in each stage and the solver's statistics (see solvestats.py).
+        hook, if given, is called with the SolveStats when the solve
+        finishes, as are the hooks added with solvestats.add_hook, also when
+        it fails
+
+        cache, a resultcache.ResultCache, returns the answer of an earlier
+        solve of the same case data with the same settings instead of
+        solving again
+
+        arrays=True returns a flowresult.FlowResult instead of the
+        dictionary, with V, theta, the Jabr variables and the branch flows
+        as arrays. its to_dict() is the dictionary
+
+        check=True verifies that the relaxation was exact (see verify.py):
+        the recovered voltages must balance every bus's power and the cones
+        must be tight, else NotExact (a ValueError) is raised. with a cache,
+        checked solves only reuse answers that passed the check
+
+        accuracy, an accuracy.TwoPhase, solves at its loose tolerance first
+        and only again at its tight one if a voltage is near its limits or
+        the loose answer looks wrong. the policy counts the solves each phase
+        settled
     """
-    case = load_case(casefile)
-    u, R, I = build_gurobi_model(case)
-    V, theta = recover_original_variables(u, I)
-    i2e = case.i2e
-    answer = {i2e[i]: (v, t) for (i, (v, t)) in enumerate(zip(V, theta))}
-    return answer
+    record = SolveStats(method, backend)
+    with record.stage('load_case'):
+        case = load_case(casefile)
+    answer, record = solve_case(case, backend, method, certificate,
+                                screen=screen, stats=record, hook=hook,
+                                cache=cache, arrays=arrays, check=check,
+                                accuracy=accuracy)
+    return (answer, record) if stats else answer
 
 
 if __name__ == '__main__':
@@ -0,0 +1,71 @@
+""" how far can the load on a tree grow before the power flow has no solution
+"""
+from __future__ import division, print_function
+from collections import namedtuple
+from numpy import asarray, real, imag
+from jabr import JabrSolver, recover_voltages
+
+
+Loadability = namedtuple('Loadability', ['scale', 'upper', 'V', 'theta',
+                                         'certificate_scale', 'certificate',
+                                         'solves'])
+
+
+def max_loadability(case, direction=None, tol=1e-4, step=1., max_scale=1e6,
+                    backend='gurobi', threads=0):
+    """ finds the largest scale for which the demands
+    case.demand + scale*direction still have a power flow solution. direction
+    is a complex array of demand changes (internal numbering) and defaults to
+    case.demand, so that 1 + scale is then the load multiplier.
+
+    brackets the boundary by doubling scale from step, then bisects until the
+    bracket is narrower than tol, re-solving one JabrSolver throughout. any
+    status other than optimal counts as infeasible, but close to the boundary
+    solvers often stop short of proving it.
+
+    returns a Loadability: the critical scale (last feasible) and the upper
+    end of the final bracket, the voltages and angles at the critical scale,
+    the lowest scale at which the backend returned a certificate of
+    infeasibility and that certificate (both None if it never did), and the
+    number of solves
+    """
+    base = case.demand
+    if direction is None:
+        direction = base
+    else:
+        direction = asarray(direction, dtype=complex)
+    solver = JabrSolver(case, backend, threads, duals=True)
+    solves = [0]
+    certificate = [None, None]
+
+    def attempt(scale):
+        demand = base + scale*direction
+        solver.update_demands(real(demand), imag(demand))
+        solves[0] += 1
+        solution = solver.optimize()
+        if solution.status == 'infeasible' and solution.dual is not None:
+            if certificate[0] is None or scale < certificate[0]:
+                certificate[:] = scale, solution.dual
+        return solution
+
+    lo, feasible = 0, attempt(0)
+    if feasible.status != 'optimal':
+        raise ValueError("no solution at the base demands: %s" %
+                         feasible.status)
+    hi, solution = step, attempt(step)
+    while solution.status == 'optimal':
+        lo, feasible = hi, solution
+        hi *= 2
+        if hi > max_scale:
+            raise ValueError("still feasible at scale %g" % lo)
+        solution = attempt(hi)
+    while hi - lo > tol:
+        mid = (lo + hi)/2
+        solution = attempt(mid)
+        if solution.status == 'optimal':
+            lo, feasible = mid, solution
+        else:
+            hi = mid
+    V, theta = recover_voltages(case, feasible.x)
+    return Loadability(lo, hi, V, theta, certificate[0], certificate[1],
+                       solves[0])
@@ -1,5 +1,18 @@
-from scipy.sparse import dok_matrix
+import os
+from hashlib import sha1
+from numpy import (array, asarray, arange, zeros, concatenate, minimum,
+                   maximum, lexsort, flatnonzero, isscalar, int32,
+                   load as load_npz, savez, savetxt, column_stack, full, ones,
+                   real, imag, searchsorted)
+from scipy.sparse import dok_matrix, coo_matrix
 from collections import namedtuple
+from topology import Topology
+from atomicwrite import atomic_write
+
+
+Gen = namedtuple('Gen', ['p', 'v'])
+
+STORE_MAGIC = b'JABRCASE'
 
 
 def z2y(r, x):
@@ -44,7 +57,7 @@ def renumber_buses(demand_dict, root):
             e2i[bus] = i
             i2e[i] = bus
             i += 1
-    for bus, d in demand_dict.iteritems():
+    for bus, d in demand_dict.items():
         i = e2i[bus]
         demands[i] = d
     return e2i, i2e, demands
@@ -53,7 +66,6 @@ def renumber_buses(demand_dict, root):
 def load_gens(casefileobj, e2i):
     """ returns a dictionary mapping generator buses to their power output and
      voltage. internal numbering """
-    Gen = namedtuple('Gen', ['p', 'v'])
     line = ''
     gens = {}
     while line.find("mpc.gen = [") == -1:
@@ -70,7 +82,7 @@ def load_gens(casefileobj, e2i):
 def adjust_demands(demands, gens):
     """ subtracts off any power generated at non-slack buses. internal numbering
     """
-    for (bus, gen) in gens.iteritems():
+    for (bus, gen) in gens.items():
         if bus != 0:
             demands[bus] -= gen.p
 
@@ -115,13 +127,125 @@ def load_branches(casefileobj, e2i):
 
 
 class Case(object):
-    pass
+    """ a radial network in internal numbering (bus 0 is the root), held in
+    flat arrays: the end points f < t, conductance g and susceptance b of
+    every branch (sorted by f, then t), a CSR adjacency matrix whose data is
+    branch index + 1 (so branch 0 isn't an implicit zero), the complex net
+    demand at every bus and the external number of every bus.
+
+    G, B, demands, branch_list, branch_map and i2e rebuild the older python
+    structures on each access, for code that still expects them. they are
+    read-only copies: changing case.demands[k] or case.G[i, j] in place
+    changes nothing. change case.demand, case.g and case.b instead, or
+    assign a whole new case.demands.
+
+    memory per bus, measured with tracemalloc on a generated 100k bus
+    feeder: about 940 bytes for the old DOK matrices, lists and dicts,
+    about 68 bytes for the arrays
+    """
+    __slots__ = ('f', 't', 'g', 'b', 'adjacency', 'demand', 'vhat', 'ext',
+                 'gens', '_topology')
+
+    def __init__(self, f, t, g, b, demands, vhat, i2e, gens):
+        f, t = asarray(f, dtype=int32), asarray(t, dtype=int32)
+        lo, hi = minimum(f, t), maximum(f, t)
+        order = lexsort((hi, lo))
+        self.f, self.t = lo[order], hi[order]
+        self.g = asarray(g, dtype=float)[order]
+        self.b = asarray(b, dtype=float)[order]
+        self.demand = asarray(demands, dtype=complex)
+        self.vhat = vhat
+        self.ext = asarray(i2e, dtype=int)
+        self.gens = gens
+        self._topology = None
+        n = len(self.demand)
+        k = arange(1, len(order)+1, dtype=int32)
+        rows = concatenate([self.f, self.t])
+        cols = concatenate([self.t, self.f])
+        self.adjacency = coo_matrix((concatenate([k, k]), (rows, cols)),
+                                    shape=(n, n)).tocsr()
+
+    @classmethod
+    def from_arrays(cls, f, t, g, b, adjacency, demand, vhat, ext, gens):
+        """ a Case over arrays already in a Case's own branch order, with its
+        adjacency matrix, used as they are rather than copied, e.g. the
+        read-only memory maps of casestore.py """
+        case = cls.__new__(cls)
+        case.f, case.t, case.g, case.b = f, t, g, b
+        case.adjacency = adjacency
+        case.demand, case.vhat, case.ext, case.gens = demand, vhat, ext, gens
+        case._topology = None
+        return case
+
+    @property
+    def n(self):
+        return len(self.demand)
+
+    @property
+    def topology(self):
+        """ the Topology index of the tree, built on first use """
+        if self._topology is None:
+            self._topology = Topology(self.f, self.t, self.n)
+        return self._topology
+
+    @property
+    def demands(self):
+        """ a list copy of demand, see the class docstring """
+        return self.demand.tolist()
+
+    @demands.setter
+    def demands(self, demands):
+        self.demand = asarray(demands, dtype=complex)
+
+    @property
+    def i2e(self):
+        return self.ext.tolist()
+
+    def symmetric_matrix(self, values):
+        """ n by n DOK matrix with values at (f, t) and (t, f), zeros left out
+        """
+        rows = concatenate([self.f, self.t])
+        cols = concatenate([self.t, self.f])
+        M = coo_matrix((concatenate([values, values]), (rows, cols)),
+                       shape=(self.n, self.n)).tocsr()
+        M.eliminate_zeros()
+        return M.todok()
+
+    @property
+    def G(self):
+        """ a DOK copy of g, see the class docstring """
+        return self.symmetric_matrix(self.g)
+
+    @property
+    def B(self):
+        """ a DOK copy of b, see the class docstring """
+        return self.symmetric_matrix(self.b)
+
+    @property
+    def branch_list(self):
+        return list(zip(self.f.tolist(), self.t.tolist()))
+
+    @property
+    def branch_map(self):
+        branch_map = {}
+        for i, (fbus, tbus) in enumerate(self.branch_list):
+            branch_map[(fbus, tbus)] = i
+            branch_map[(tbus, fbus)] = i
+        return branch_map
+
+    def branch_index(self, i, j):
+        """ index of the branch between buses i and j, -1 if there isn't one.
+        i and j can be arrays """
+        k = asarray(self.adjacency[i, j]).ravel().astype(int) - 1
+        return int(k[0]) if isscalar(i) and isscalar(j) else k
 
 
-def load_case(casefile):
+def load_case_lines(casefile):
     """ returns list of demands, conductance and susceptance matrices, list of
     branches, map of branches to list index, root voltage, and internal to
     external numbering map. uses internal numbering
+
+    reads the file line by line; load_case does the same in bulk
     """
     # TODO be consistent, should it be load_case or loadcase?
     casefileobj = open(casefile)
@@ -130,14 +254,145 @@ def load_case(casefile):
     gens = load_gens(casefileobj, e2i)
     adjust_demands(demands, gens)
     G, B, branch_list, branch_map = load_branches(casefileobj, e2i)
-    c = Case()
-    c.demands = demands
-    c.G = G
-    c.B = B
-    c.branch_list = branch_list
-    c.branch_map = branch_map
-    c.vhat = vhat
-    c.i2e = i2e
-    c.gens = gens
-    return c
+    f, t = zip(*branch_list)
+    g = [G[i, j] for i, j in branch_list]
+    b = [B[i, j] for i, j in branch_list]
+    return Case(f, t, g, b, demands, vhat, i2e, gens)
+
+
+def parse_block(text, name, columns=1):
+    """ returns the matrix assigned to mpc.<name> in a matpower file as a 2d
+    array, converted in one go rather than line by line. rows of different
+    lengths are cut to the shortest, which must have at least the first
+    columns entries, the ones the caller reads """
+    header = 'mpc.%s = [' % name
+    start = text.find(header)
+    if start == -1:
+        raise ValueError("no '%s' block in case file" % header)
+    start += len(header)
+    block = text[start:text.find('];', start)]
+    if '%' in block:
+        block = '\n'.join(line.split('%')[0] for line in block.splitlines())
+    rows = [row for row in (line.split() for line in
+                            block.replace(';', '\n').splitlines()) if row]
+    widths = [len(row) for row in rows]
+    width = min(widths) if rows else columns
+    if width < columns:
+        row = widths.index(width)
+        raise ValueError("row %d of mpc.%s has %d columns, expected at least "
+                         "%d" % (row + 1, name, width, columns))
+    if rows and max(widths) > width:
+        tokens = [token for row in rows for token in row[:width]]
+    else:
+        tokens = block.replace(';', ' ').split()
+    return array(tokens, dtype=float).reshape(-1, width)
+
+
+def case_from_blocks(bus, gen, branch):
+    """ builds the same Case as load_case_lines from the mpc.bus, mpc.gen and
+    mpc.branch matrices """
+    ids = bus[:, 0].astype(int)
+    slack = flatnonzero(bus[:, 1] == 3)
+    root, vhat = 1, 1
+    if len(slack):
+        root, vhat = ids[slack[-1]], float(bus[slack[-1], 7])
+    i2e = concatenate([[root], sorted(ids[ids != root])]).astype(int)
+    n = len(i2e)
+    # external numbers are looked up by bisection, not in a table as long
+    # as the largest bus number
+    sorter = i2e.argsort()
+
+    def e2i(buses):
+        k = sorter[minimum(searchsorted(i2e, buses, sorter=sorter), n-1)]
+        unknown = flatnonzero(i2e[k] != buses)
+        if len(unknown):
+            raise ValueError("no bus %d in mpc.bus" % buses[unknown[0]])
+        return k
+
+    demands = zeros(n, dtype=complex)
+    demands[e2i(ids)] = bus[:, 2] + 1j*bus[:, 3]
+    gbus = e2i(gen[:, 0].astype(int))
+    gens = {bus: Gen(p, v) for bus, p, v in
+            zip(gbus.tolist(), gen[:, 1].tolist(), gen[:, 5].tolist())}
+    adjust_demands(demands, gens)
+
+    f, t = e2i(branch[:, 0].astype(int)), e2i(branch[:, 1].astype(int))
+    assert len(f) == n-1, "it doesn't look like there are exactly n-1 branches"
+    g, b = z2y(branch[:, 2], branch[:, 3])
+    return Case(f, t, g, b, demands, vhat, i2e, gens)
+
 
+def load_case(casefile, cache_dir=None, scenario=0):
+    """ returns list of demands, conductance and susceptance matrices, list of
+    branches, map of branches to list index, root voltage, and internal to
+    external numbering map. uses internal numbering
+
+    if cache_dir is given, the parsed bus, gen and branch matrices are kept
+    there in a .npz file named after the hash of the file contents, so loading
+    the same case again skips the parsing
+
+    casefile can also be a case store (see casestore.py), in which case the
+    result is a read-only view over it with the demands of scenario
+    """
+    with open(casefile, 'rb') as casefileobj:
+        content = casefileobj.read(len(STORE_MAGIC))
+        if content == STORE_MAGIC:
+            from casestore import open_store  # casestore imports loadcase
+            return open_store(casefile, scenario)
+        content += casefileobj.read()
+    cachefile = None
+    if cache_dir is not None:
+        cachefile = os.path.join(cache_dir, sha1(content).hexdigest() + '.npz')
+        if os.path.exists(cachefile):
+            with load_npz(cachefile) as cached:
+                return case_from_blocks(cached['bus'], cached['gen'],
+                                        cached['branch'])
+    text = content.decode('latin-1')
+    # the columns case_from_blocks reads: bus to Vm, gen to Vg, branch to x
+    bus, gen, branch = [parse_block(text, name, columns) for name, columns in
+                        (('bus', 8), ('gen', 6), ('branch', 4))]
+    if cachefile is not None:
+        if not os.path.isdir(cache_dir):
+            os.makedirs(cache_dir)
+        with atomic_write(cachefile) as cachefileobj:
+            savez(cachefileobj, bus=bus, gen=gen, branch=branch)
+    return case_from_blocks(bus, gen, branch)
+
+
+def save_case(case, casefile, name=None):
+    """ writes case as a matpower file that load_case reads back as the same
+    Case: the root is the slack bus, every other generator a PV bus with its
+    output added back onto its bus's demand. branch impedances are 1/(g+jb)
+    """
+    n = case.n
+    name = name or os.path.splitext(os.path.basename(casefile))[0]
+    gens = sorted(case.gens)
+    p = array([case.gens[bus].p for bus in gens])
+    v = array([case.gens[bus].v for bus in gens])
+    demand = case.demand.copy()
+    pv = array([bus for bus in gens if bus != 0], dtype=int)
+    demand[pv] += [case.gens[bus].p for bus in pv]
+    kind = ones(n)
+    kind[pv] = 2
+    kind[0] = 3
+    vm = ones(n)
+    vm[pv] = [case.gens[bus].v for bus in pv]
+    vm[0] = case.vhat
+    bus = column_stack([case.ext, kind, real(demand), imag(demand),
+                        zeros((n, 2)), ones(n), vm, zeros(n), ones((n, 2)),
+                        full(n, 1.1), full(n, 0.9)])
+    gen = column_stack([case.ext[gens], p, zeros((len(gens), 3)), v,
+                        ones((len(gens), 2)), zeros((len(gens), 13))])
+    z = 1/(case.g + 1j*case.b)
+    m = len(z)
+    branch = column_stack([case.ext[case.f], case.ext[case.t], real(z),
+                           imag(z), zeros((m, 6)), ones(m), full(m, -360.),
+                           full(m, 360.)])
+    with open(casefile, 'w') as out:
+        out.write("function mpc = %s\n\n%%%% MATPOWER Case Format : "
+                  "Version 2\nmpc.version = '2';\n\n"
+                  "mpc.baseMVA = 1;\n\n" % name)
+        for block, rows in (('bus', bus), ('gen', gen), ('branch', branch)):
+            out.write('mpc.%s = [\n' % block)
+            savetxt(out, rows, fmt='\t%.17g', delimiter='', newline=';\n')
+            out.write('];\n\n')
@@ -0,0 +1,178 @@
+""" probabilistic power flow: voltage statistics of a case under uncertain
+demands, by Monte Carlo sampling.
+
+samples are drawn in batches, each from its own seeded generator, so a run
+is reproducible whatever the number of workers. every worker keeps one copy
+of the case and one JabrSolver, and triages each sample of a batch: the O(n)
+pre-screen (prescreen.py) rejects samples it can prove infeasible, the
+backward/forward sweep (sweep.py) solves the easy ones if the root is the
+only generator, and only the rest reach the SOCP, re-solved with just the
+demands updated (warm started where the backend can, see backends.py)
+"""
+from __future__ import division, print_function
+from collections import namedtuple
+from multiprocessing import Pool, cpu_count
+from numpy import (array, asarray, concatenate, full, imag, isnan, isscalar,
+                   nan, nanpercentile, real, zeros)
+from numpy.random import RandomState
+from jabr import JabrSolver, recover_voltages
+from loadcase import Case
+from prescreen import screen
+from sweep import sweep_voltages
+
+
+MonteCarlo = namedtuple('MonteCarlo', ['levels', 'quantiles', 'violation',
+                                       'any_violation', 'infeasible',
+                                       'samples', 'counts', 'V'])
+
+WORKER = {}
+
+
+def sample_batches(mean, cov=None, samples=1000, batch_size=100, seed=0):
+    """ yields complex demand arrays of up to batch_size rows, samples rows in
+    all, with a column per bus. samples can instead be a (samples by bus)
+    array of demands to use as they are. otherwise the real and reactive
+    demands are normally distributed around the complex mean, with cov
+    either the variances (length 2n, P then Q) of independent demands or
+    their 2n by 2n covariance matrix. batch i is drawn from
+    RandomState([seed, i]) """
+    if not isscalar(samples):
+        samples = asarray(samples, dtype=complex)
+        for start in range(0, len(samples), batch_size):
+            yield samples[start:start + batch_size]
+        return
+    mean = asarray(mean, dtype=complex)
+    n = len(mean)
+    center = concatenate([real(mean), imag(mean)])
+    cov = zeros(2*n) if cov is None else asarray(cov, dtype=float)
+    for i, start in enumerate(range(0, samples, batch_size)):
+        rs = RandomState([seed, i])
+        size = min(batch_size, samples - start)
+        if cov.ndim == 1:
+            draw = center + rs.standard_normal((size, 2*n))*cov**.5
+        else:
+            draw = rs.multivariate_normal(center, cov, size)
+        yield draw[:, :n] + 1j*draw[:, n:]
+
+
+def start_worker(case, backend, threads):
+    """ pool initializer: the worker's case and JabrSolver, kept for all the
+    batches it solves """
+    WORKER['case'] = case
+    WORKER['solver'] = JabrSolver(case, backend, threads)
+
+
+def solve_batch(demands):
+    """ solves every row of demands with the worker's case. returns the
+    voltage magnitudes (NaN where not solved) and how each row ended:
+    'screened', 'swept', 'solved' or the backend's status """
+    case, solver = WORKER['case'], WORKER['solver']
+    sweepable = list(case.gens) == [0]
+    V = full((len(demands), case.n), nan)
+    outcomes = []
+    for row, demand in enumerate(demands):
+        case.demand = demand
+        if screen(case).infeasible:
+            outcomes.append('screened')
+            continue
+        if sweepable:
+            V_row, _ = sweep_voltages(case.f, case.t, case.g, case.b, demand,
+                                      case.vhat, topology=case.topology)
+            if V_row is not None:
+                V[row] = V_row
+                outcomes.append('swept')
+                continue
+        solver.update_demands(real(demand), imag(demand))
+        solution = solver.optimize()
+        if solution.status == 'optimal':
+            V[row], _ = recover_voltages(case, solution.x)
+            outcomes.append('solved')
+        else:
+            outcomes.append(solution.status)
+    return V, outcomes
+
+
+def probabilistic_flow(case, cov=None, samples=1000, mean=None,
+                       batch_size=100, seed=0, vmin=.95, vmax=1.05,
+                       levels=(.05, .5, .95), workers=None, backend='gurobi',
+                       threads=None, keep=False):
+    """ voltage statistics of case under random demands (see sample_batches;
+    mean defaults to case.demand), solved in a pool of workers processes
+    (workers=1 solves them in this process). returns a MonteCarlo with
+
+    levels, quantiles: the quantile levels and, for each, the voltage
+    magnitude quantile at every bus over the samples that have a solution
+    violation: for every bus, the fraction of those samples in which its
+        voltage is outside [vmin, vmax]
+    any_violation: the fraction of them with a violation at any bus
+    infeasible: the fraction of all samples without a solution
+    samples, counts: the number of samples, and how many ended in each way
+        ('screened', 'swept', 'solved', or a backend status)
+    V: the voltage magnitudes of every sample (NaN where there is no
+        solution) if keep is set, else None
+
+    all buses in internal numbering
+    """
+    mean = case.demand if mean is None else mean
+    workers = workers or cpu_count()
+    if threads is None:
+        threads = max(1, cpu_count() // workers)
+    batches = sample_batches(mean, cov, samples, batch_size, seed)
+    pool = None
+    if workers > 1:
+        pool = Pool(workers, start_worker, (case, backend, threads))
+        results = pool.imap(solve_batch, batches)
+    else:
+        # the worker changes its case's demands, so give it a copy
+        start_worker(Case(case.f, case.t, case.g, case.b, case.demand,
+                          case.vhat, case.ext, case.gens), backend, threads)
+        results = (solve_batch(batch) for batch in batches)
+    V, counts = [], {}
+    try:
+        for V_batch, outcomes in results:
+            V.append(V_batch)
+            for outcome in outcomes:
+                counts[outcome] = counts.get(outcome, 0) + 1
+    finally:
+        if pool is not None:
+            pool.terminate()
+            pool.join()
+        WORKER.clear()
+    V = concatenate(V) if V else zeros((0, case.n))
+    solved = ~isnan(V[:, 0])
+    good = V[solved]
+    outside = (good < vmin) | (good > vmax)
+    total = len(V)
+    quantiles = (nanpercentile(good, 100*array(levels), axis=0) if len(good)
+                 else full((len(levels), case.n), nan))
+    return MonteCarlo(
+        tuple(levels), quantiles,
+        outside.mean(axis=0) if len(good) else full(case.n, nan),
+        outside.any(axis=1).mean() if len(good) else nan,
+        (total - solved.sum())/total if total else nan, total, counts,
+        V if keep else None)
+
+
+if __name__ == '__main__':
+    import sys
+    from time import time
+    from loadcase import load_case
+    casefile = sys.argv[1] if len(sys.argv) > 1 else 'cases/case85_v2.m'
+    samples = int(sys.argv[2]) if len(sys.argv) > 2 else 1000
+    backend = sys.argv[3] if len(sys.argv) > 3 else 'gurobi'
+    case = load_case(casefile)
+    # independent demands with a 20% standard deviation
+    std = .2*concatenate([abs(real(case.demand)), abs(imag(case.demand))])
+    start = time()
+    result = probabilistic_flow(case, std**2, samples, backend=backend)
+    print('%d samples in %.2fs: %s' % (samples, time() - start, ', '.join(
+        '%d %s' % (count, outcome)
+        for outcome, count in sorted(result.counts.items()))))
+    print('infeasible %.3f, any violation %.3f' % (result.infeasible,
+                                                    result.any_violation))
+    print('bus   p(violation)  ' + '  '.join('V%-4g' % (100*level)
+                                             for level in result.levels))
+    worst = result.violation.argsort()[::-1][:10]
+    for bus in worst:
+        print('%4d %10.3f    ' % (case.i2e[bus], result.violation[bus]) +
+              '  '.join('%.3f' % q for q in result.quantiles[:, bus]))
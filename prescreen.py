@@ -0,0 +1,90 @@
+""" cheap necessary conditions for a tree to have a power flow solution,
+checked before building the SOCP.
+
+branch k, from bus i to the subtree below it, carries at least the subtree's
+total demand (P, Q): the subtree's losses only add to it as long as every
+branch in it has r, x >= 0. with a = r*P + x*Q the receiving end voltage
+only exists if a <= V_i^2/4 (the discriminant of the two bus power flow
+equation), and V_j^2 <= V_i^2 - 2*a, so bounds on V^2 can be carried down
+from the root. subtrees with a generator other than the root are skipped,
+since its reactive output is unknown; generator buses restart the bound at
+their fixed voltage
+"""
+from __future__ import division, print_function
+from collections import namedtuple
+from numpy import real, imag, inf, full, zeros, where, argmax
+
+
+Screen = namedtuple('Screen', ['infeasible', 'branch', 'a', 'bound'])
+
+
+class ScreenedOut(ValueError):
+    """ raised by solve_case(..., screen=True) when the pre-screen proves the
+    case infeasible. screen holds the offending branch and its numbers """
+
+    def __init__(self, screen):
+        ValueError.__init__(self, "screened out: branch %d needs r*P + x*Q = "
+                            "%g <= V^2/4 <= %g" % (screen.branch, screen.a,
+                                                   screen.bound))
+        self.screen = screen
+
+
+def screen(case):
+    """ runs the necessary condition on every branch of case in O(n). returns
+    a Screen: infeasible is True if some branch fails, in which case branch is
+    the worst one (as an index into case.branch_list), a its r*P + x*Q and
+    bound the upper bound on V^2/4 at its sending end, which together certify
+    the infeasibility. otherwise branch is -1 """
+    topology = case.topology
+    n = case.n
+    child, parent = topology.child, topology.parent
+    y2 = case.g**2 + case.b**2
+    r, x = case.g/y2, -case.b/y2
+    P = topology.subtree_sum(real(case.demand))
+    Q = topology.subtree_sum(imag(case.demand))
+    # a bus is unusable if it's a generator, or below a branch with r or x < 0
+    unusable = zeros(n)
+    unusable[child[(r < 0) | (x < 0)]] = 1
+    gens = [bus for bus in case.gens if bus != 0]
+    unusable[gens] = 1
+    clean = zeros(n, dtype=bool)
+    clean[child] = topology.subtree_sum(unusable)[child] == 0
+    a = zeros(n)
+    a[child] = r*P[child] + x*Q[child]
+
+    vmax = full(n, inf)
+    vmax[0] = case.vhat**2
+    fixed = full(n, -1.)
+    fixed[gens] = [case.gens[bus].v**2 for bus in gens]
+    for tier in topology.levels[1:]:
+        vmax[tier] = where(clean[tier], vmax[parent[tier]] - 2*a[tier], inf)
+        vmax[tier] = where(fixed[tier] >= 0, fixed[tier], vmax[tier])
+
+    bound = zeros(n)
+    bound[child] = vmax[parent[child]]/4
+    excess = where(clean, a - bound, -inf)
+    worst = int(argmax(excess))
+    if excess[worst] <= 0:
+        return Screen(False, -1, 0., inf)
+    return Screen(True, int(topology.parent_branch[worst]), a[worst],
+                  bound[worst])
+
+
+if __name__ == '__main__':
+    from glob import glob
+    from jabr import solve_jabr
+    from loadcase import load_case
+    screened = solved = 0
+    for casefile in sorted(glob('cases/case*.m')):
+        case = load_case(casefile)
+        result = screen(case)
+        try:
+            solve_jabr(case, 'clarabel')
+            status = 'feasible'
+        except ValueError as e:
+            status = str(e)
+        screened += result.infeasible
+        solved += not result.infeasible
+        print('%-28s %-10s %s' % (casefile, 'screened' if result.infeasible
+                                  else 'passed', status))
+    print('%d screened out, %d passed on to the SOCP' % (screened, solved))
@@ -0,0 +1,157 @@
+""" caches solve answers by the content of the case, so solving the same
+case again with the same settings returns the first answer instead of
+re-solving. pass a ResultCache as solve(..., cache=...)
+
+the key is a hash of the case's normalized arrays (branches, admittances,
+demands, generator setpoints, vhat and bus numbers) and the settings that
+change the answer, so an identical case loaded from another file, or a Case
+changed and changed back exactly, hits. answers live in an in-memory LRU
+tier and, if a directory is given, in a .npz file per key there, least
+recently used deleted first once the files pass max_bytes. only answers are
+cached, not failures
+"""
+from __future__ import division, print_function
+import os
+from collections import OrderedDict
+from hashlib import sha1
+from numpy import array, ascontiguousarray, load as load_npz, savez
+from atomicwrite import atomic_write
+
+
+def case_key(case, backend='gurobi', method='socp', certificate=False,
+             screen=False, accuracy=None, check=False):
+    """ hex digest of case's data and the solve settings. threads is left
+    out, it doesn't change the answer. check is in, so that answers cached
+    by a check=True solve, which are only stored once verified, are kept
+    apart from unverified ones """
+    digest = sha1()
+    for values, dtype in ((case.f, 'int64'), (case.t, 'int64'),
+                          (case.ext, 'int64'), (case.g, 'float64'),
+                          (case.b, 'float64'), (case.demand, 'complex128')):
+        values = ascontiguousarray(values, dtype=dtype)
+        if dtype != 'int64':
+            values = values + 0.  # -0.0 and 0.0 hash the same
+        digest.update(values.tobytes())
+    gens = sorted((bus, float(gen.p) + 0., float(gen.v) + 0.)
+                  for bus, gen in case.gens.items())
+    settings = (float(case.vhat), gens, backend, method, bool(certificate),
+                bool(screen))
+    if accuracy is not None:
+        settings += (accuracy.settings,)
+    if check:
+        settings += ('check',)
+    digest.update(repr(settings).encode())
+    return digest.hexdigest()
+
+
+class ResultCache(object):
+    """ answers by case_key: up to size in memory, and if directory is given
+    also on disk, up to max_bytes (no limit if None). hits counts answers
+    found in memory, disk_hits those found only on disk, misses the rest """
+
+    def __init__(self, size=128, directory=None, max_bytes=None):
+        self.size = size
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.memory = OrderedDict()
+        self.hits = self.disk_hits = self.misses = 0
+        if directory is not None and not os.path.isdir(directory):
+            os.makedirs(directory)
+
+    def __len__(self):
+        return len(self.memory)
+
+    @property
+    def hit_rate(self):
+        lookups = self.hits + self.disk_hits + self.misses
+        return (self.hits + self.disk_hits)/lookups if lookups else 0.
+
+    def counters(self):
+        return {'hits': self.hits, 'disk_hits': self.disk_hits,
+                'misses': self.misses, 'hit_rate': self.hit_rate}
+
+    def key(self, case, backend='gurobi', method='socp', certificate=False,
+            screen=False, accuracy=None, check=False):
+        return case_key(case, backend, method, certificate, screen, accuracy,
+                        check)
+
+    def path(self, key):
+        return os.path.join(self.directory, key + '.npz')
+
+    def get(self, key):
+        """ a copy of the answer stored under key, None if there isn't one
+        """
+        answer = self.memory.pop(key, None)
+        if answer is not None:
+            self.hits += 1
+        elif self.directory is not None:
+            answer = self.load(key)
+            if answer is not None:
+                self.disk_hits += 1
+        if answer is None:
+            self.misses += 1
+            return None
+        self.remember(key, answer)
+        return dict(answer)
+
+    def load(self, key):
+        """ the answer saved on disk under key, None if there isn't one """
+        try:
+            with load_npz(self.path(key)) as saved:
+                answer = dict(zip(saved['bus'].tolist(),
+                                  zip(saved['V'].tolist(),
+                                      saved['theta'].tolist())))
+            os.utime(self.path(key), None)  # mark it recently used
+        except (IOError, OSError, ValueError):
+            return None  # not there, or evicted by another process
+        return answer
+
+    def remember(self, key, answer):
+        """ puts answer at the most recently used end of the memory tier """
+        self.memory[key] = answer
+        while len(self.memory) > self.size:
+            self.memory.popitem(last=False)
+
+    def put(self, key, answer):
+        """ stores answer, a dictionary as returned by solve, under key """
+        self.remember(key, dict(answer))
+        if self.directory is None:
+            return
+        buses = sorted(answer)
+        V, theta = zip(*[answer[bus] for bus in buses])
+        with atomic_write(self.path(key)) as answerfile:
+            savez(answerfile, bus=array(buses), V=array(V),
+                  theta=array(theta))
+        if self.max_bytes is not None:
+            self.evict()
+
+    def evict(self):
+        """ deletes the least recently used files on disk until they fit in
+        max_bytes """
+        files = []
+        for name in os.listdir(self.directory):
+            if name.endswith('.npz'):
+                path = os.path.join(self.directory, name)
+                try:
+                    info = os.stat(path)
+                except OSError:
+                    continue
+                files.append((info.st_mtime, info.st_size, path))
+        total = sum(size for _, size, _ in files)
+        for _, size, path in sorted(files):
+            if total <= self.max_bytes:
+                break
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+            total -= size
+
+    def clear(self):
+        """ empties both tiers and resets the counters """
+        self.memory.clear()
+        if self.directory is not None:
+            for name in os.listdir(self.directory):
+                if name.endswith('.npz'):
+                    os.remove(os.path.join(self.directory, name))
+        self.hits = self.disk_hits = self.misses = 0
@@ -0,0 +1,161 @@
+""" linear sensitivities of bus voltage magnitudes to changes in bus demands
+at a solved operating point, instead of re-solving the case once per bus.
+
+the Jabr relaxation is exact at a solution, so the recovered voltages solve
+the AC power flow equations and their Jacobian (in theta at every bus but
+the root, and in V at every bus without a generator) can be factorized
+once. columns of dV/dP and dV/dQ (the effect of one bus's demand on every
+voltage) and rows (every demand's effect on one voltage) are then one
+sparse solve each, so a slice, e.g. a subtree from case.topology, costs
+only as many solves as it has buses.
+
+rank_buses orders buses by impact in one O(n) pass over the tree with the
+linearized DistFlow equations: a demand increase at bus k lowers V^2 at
+every bus i by 2 times the resistance (for P, reactance for Q) of the path
+the two share from the root, most at k itself and its subtree, so the
+impact of k is its own path resistance or reactance.
+
+demands are net demands (load positive) as in case.demand, all in internal
+numbering. voltages at the root and at generators don't move, and neither
+does anything when the demand changes at the root, or (for Q) at a
+generator, which absorbs it
+"""
+from __future__ import division, print_function
+from numpy import (arange, argsort, asarray, atleast_1d, concatenate, conj,
+                   exp, full, real, imag, zeros)
+from scipy.sparse import coo_matrix, diags, hstack, vstack
+from scipy.sparse.linalg import splu
+from flowresult import FlowResult
+
+
+def admittance_matrix(case):
+    """ the n by n bus admittance matrix Y, so that the injections are
+    S = V*conj(Y*V) """
+    y = case.g + 1j*case.b
+    n = case.n
+    rows = concatenate([case.f, case.t, case.f, case.t])
+    cols = concatenate([case.t, case.f, case.f, case.t])
+    return coo_matrix((concatenate([-y, -y, y, y]), (rows, cols)),
+                      shape=(n, n)).tocsc()
+
+
+def jacobian(case, V, theta):
+    """ the Jacobian of the bus injections S = P + jQ with respect to the
+    voltage angles and magnitudes at V, theta: returns dS/dtheta, dS/dV (n
+    by n, complex) as matpower's dSbus_dV does in polar coordinates """
+    Y = admittance_matrix(case)
+    E = asarray(V)*exp(1j*asarray(theta))
+    I = Y.dot(E)
+    dS_dtheta = 1j*diags(E).dot(conj(diags(I) - Y.dot(diags(E))))
+    dS_dV = (diags(E).dot(conj(Y.dot(diags(E/abs(E))))) +
+             conj(diags(I)).dot(diags(E/abs(E))))
+    return dS_dtheta, dS_dV
+
+
+class Sensitivity(object):
+    """ the factorized power flow Jacobian of case at V, theta (internal
+    numbering, as recover_voltages returns them) """
+
+    def __init__(self, case, V, theta):
+        self.case = case
+        self.V, self.theta = asarray(V), asarray(theta)
+        n = case.n
+        gens = set(case.gens)
+        self.angles = arange(1, n)  # unknown theta, one P equation each
+        self.pq = asarray([i for i in range(1, n) if i not in gens],
+                          dtype=int)  # unknown V, one Q equation each
+        dS_dtheta, dS_dV = jacobian(case, V, theta)
+        dS_dtheta, dS_dV = dS_dtheta.tocsr(), dS_dV.tocsr()
+        a, q = self.angles, self.pq
+        J = vstack([
+            hstack([real(dS_dtheta[a][:, a]), real(dS_dV[a][:, q])]),
+            hstack([imag(dS_dtheta[q][:, a]), imag(dS_dV[q][:, q])])],
+            format='csc')
+        self.lu = splu(J)
+        # row or column of J for each bus's P (or Q) equation and V unknown
+        self.P_index = full(n, -1, dtype=int)
+        self.P_index[a] = arange(len(a))
+        self.Q_index = full(n, -1, dtype=int)
+        self.Q_index[q] = len(a) + arange(len(q))
+
+    def columns(self, buses):
+        """ dV/dP and dV/dQ for a change in demand at each of buses: two n by
+        len(buses) arrays, column k the change in every voltage magnitude
+        per unit of demand at buses[k] """
+        buses = atleast_1d(asarray(buses, dtype=int))
+        return (self.solve_columns(self.P_index[buses]),
+                self.solve_columns(self.Q_index[buses]))
+
+    def solve_columns(self, index):
+        n, size = self.case.n, self.lu.shape[0]
+        result = zeros((n, len(index)))
+        keep = index >= 0
+        if keep.any():
+            rhs = zeros((size, keep.sum()))
+            rhs[index[keep], arange(keep.sum())] = -1  # demand = -injection
+            dx = self.lu.solve(rhs)
+            columns = keep.nonzero()[0]
+            result[self.pq[:, None], columns] = dx[len(self.angles):]
+        return result
+
+    def rows(self, buses):
+        """ dV/dP and dV/dQ of the voltage at each of buses: two len(buses)
+        by n arrays, row k the change in the voltage magnitude at buses[k]
+        per unit of demand at every bus """
+        buses = atleast_1d(asarray(buses, dtype=int))
+        n, size = self.case.n, self.lu.shape[0]
+        dP, dQ = zeros((len(buses), n)), zeros((len(buses), n))
+        index = self.Q_index[buses]  # V unknowns share the Q equations' index
+        keep = index >= 0
+        if keep.any():
+            rhs = zeros((size, keep.sum()))
+            rhs[index[keep], arange(keep.sum())] = 1
+            # rows of J^-1 are columns of J^-T
+            dy = -self.lu.solve(rhs, trans='T').T
+            rows = keep.nonzero()[0][:, None]
+            dP[rows, self.angles] = dy[:, self.P_index[self.angles]]
+            dQ[rows, self.pq] = dy[:, self.Q_index[self.pq]]
+        return dP, dQ
+
+    def full(self):
+        """ the whole n by n dV/dP and dV/dQ, column k for bus k's demand """
+        return self.columns(arange(self.case.n))
+
+
+def answer_arrays(case, answer):
+    """ voltage magnitudes and angles in internal numbering from an answer of
+    solve, a dictionary of external bus number to (V, theta), or a
+    FlowResult """
+    if isinstance(answer, FlowResult):
+        return answer.V, answer.theta
+    V, theta = zip(*[answer[bus] for bus in case.i2e])
+    return asarray(V), asarray(theta)
+
+
+def sensitivity(case, answer):
+    """ the Sensitivity of case at answer, as returned by solve or
+    solve_case """
+    return Sensitivity(case, *answer_arrays(case, answer))
+
+
+def rank_buses(case, V=None, reactive=False):
+    """ buses in decreasing order of their demand's linearized impact on
+    voltages, and the impacts, |dV/dP| at the bus itself (|dV/dQ| if
+    reactive): the resistance (reactance) of its path from the root, or from
+    the nearest generator above it, which holds its voltage, over its
+    voltage. V defaults to case.vhat everywhere. the root and generators,
+    whose voltages don't move, come last """
+    topology = case.topology
+    z = 1/(case.g + 1j*case.b)
+    step = zeros(case.n)
+    step[topology.child] = imag(z) if reactive else real(z)
+    path = topology.path_sum(step)
+    start = zeros(case.n)
+    gens = asarray([bus for bus in case.gens if bus != 0], dtype=int)
+    for bus in gens[argsort(topology.depth[gens], kind='stable')]:
+        start[topology.subtree(bus)] = path[bus]  # deeper ones overwrite
+    V = full(case.n, float(case.vhat)) if V is None else asarray(V)
+    impact = abs(path - start)/V
+    impact[0] = 0
+    order = argsort(-impact, kind='stable')
+    return order, impact[order]
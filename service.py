@@ -0,0 +1,294 @@
+""" a long-lived local solve service, so that consumers don't pay for the
+imports, load_case and the model build on every question.
+
+cases are loaded once and kept resident, with their JabrSolver, under a
+case id. each request is a line of JSON over a unix socket or a localhost
+TCP port, and gets one line of JSON back, in order, per connection:
+
+    {"op": "load", "id": "feeder", "casefile": "cases/case85_v2.m"}
+    {"op": "solve", "id": "feeder", "demands": {"12": [0.1, 0.05]}}
+    {"op": "unload", "id": "feeder"}
+    {"op": "stats"}
+
+demands overrides the real and reactive load of some buses (external
+numbers) for that one solve; a generator's output is still taken off its
+bus's load, as load_case does. replies have "ok": true, or false and an
+"error"; solve replies carry the status and "buses", "V" and "theta"
+lists. loads and solves run in a bounded pool of worker threads (the
+backends release the GIL while they solve), one at a time per case. once
+max_pending requests are queued or running, new ones are refused with the
+error "busy" straight away rather than queued without limit, so callers can
+back off; stats reports the queue depth and counts.
+
+    python service.py --socket /tmp/jabr.sock --backend clarabel
+
+ServiceClient is a small blocking client, LocalService runs a service in a
+background thread, e.g. for tests
+"""
+from __future__ import division, print_function
+import asyncio
+import json
+import os
+import socket
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from multiprocessing import cpu_count
+from tempfile import mkdtemp
+from numpy import imag, real
+from jabr import JabrSolver, recover_voltages
+from loadcase import load_case
+
+
+class Resident(object):
+    """ a loaded case, its solver, and the lock that keeps its solves one at
+    a time """
+
+    def __init__(self, case, solver):
+        self.case = case
+        self.solver = solver
+        self.e2i = {bus: i for i, bus in enumerate(case.i2e)}
+        self.lock = threading.Lock()
+
+
+class SolveService(object):
+    """ the resident cases and the worker pool, served by handle """
+
+    def __init__(self, backend='gurobi', workers=None, max_pending=64,
+                 threads=1):
+        self.backend = backend
+        self.threads = threads
+        self.workers = workers or cpu_count()
+        self.max_pending = max_pending
+        self.executor = ThreadPoolExecutor(self.workers)
+        self.cases = {}
+        self.pending = self.running = self.completed = self.rejected = 0
+        self.count_lock = threading.Lock()
+
+    def metrics(self):
+        return {'cases': len(self.cases), 'workers': self.workers,
+                'pending': self.pending, 'running': self.running,
+                'queued': self.pending - self.running,
+                'completed': self.completed, 'rejected': self.rejected,
+                'max_pending': self.max_pending}
+
+    async def handle(self, reader, writer):
+        """ answers one connection's requests until it closes """
+        try:
+            while True:
+                line = await reader.readline()
+                if not line:
+                    break
+                try:
+                    reply = await self.dispatch(json.loads(line.decode()))
+                except Exception as e:
+                    reply = {'ok': False,
+                             'error': '%s: %s' % (type(e).__name__, e)}
+                writer.write((json.dumps(reply) + '\n').encode())
+                await writer.drain()
+        finally:
+            writer.close()
+
+    async def dispatch(self, request):
+        op = request.get('op')
+        if op == 'stats':
+            return dict(self.metrics(), ok=True)
+        if op == 'ping':
+            return {'ok': True}
+        handlers = {'load': self.load, 'solve': self.solve,
+                    'unload': self.unload}
+        if op not in handlers:
+            raise ValueError("unknown op %r, use %s" % (
+                op, ', '.join(sorted(list(handlers) + ['ping', 'stats']))))
+        if self.pending >= self.max_pending:
+            self.rejected += 1
+            return {'ok': False, 'error': 'busy', 'pending': self.pending}
+        self.pending += 1
+        try:
+            loop = asyncio.get_running_loop()
+            reply = await loop.run_in_executor(self.executor, self.run,
+                                               handlers[op], request)
+        finally:
+            self.pending -= 1
+        self.completed += 1
+        return reply
+
+    def run(self, handler, request):
+        """ runs handler in a worker thread, counting it as running """
+        with self.count_lock:
+            self.running += 1
+        try:
+            return handler(request)
+        finally:
+            with self.count_lock:
+                self.running -= 1
+
+    def resident(self, request):
+        case_id = request.get('id')
+        if case_id not in self.cases:
+            raise KeyError("no case loaded with id %r" % case_id)
+        return self.cases[case_id]
+
+    def load(self, request):
+        case = load_case(request['casefile'])
+        resident = Resident(case, JabrSolver(case, self.backend,
+                                             self.threads))
+        self.cases[request['id']] = resident
+        return {'ok': True, 'id': request['id'], 'n': case.n}
+
+    def unload(self, request):
+        self.resident(request)
+        del self.cases[request['id']]
+        return {'ok': True, 'id': request['id']}
+
+    def solve(self, request):
+        resident = self.resident(request)
+        case = resident.case
+        demand = case.demand.copy()
+        for bus, (P, Q) in request.get('demands', {}).items():
+            if int(bus) not in resident.e2i:
+                raise KeyError("no bus %s in case %r" % (bus, request['id']))
+            k = resident.e2i[int(bus)]
+            gen = case.gens.get(k) if k != 0 else None
+            demand[k] = P + 1j*Q - (gen.p if gen is not None else 0)
+        with resident.lock:
+            resident.solver.update_demands(real(demand), imag(demand))
+            solution = resident.solver.optimize()
+        if solution.status != 'optimal':
+            raise ValueError("%s failed to converge: %s" %
+                             (self.backend, solution.status))
+        V, theta = recover_voltages(case, solution.x)
+        return {'ok': True, 'id': request['id'], 'status': solution.status,
+                'iterations': int(solution.iterations),
+                'solve_time': solution.solve_time, 'buses': case.i2e,
+                'V': V.tolist(), 'theta': theta.tolist()}
+
+
+async def start_server(service, path=None, host='127.0.0.1', port=0):
+    """ serves service on the unix socket path, or else on host and port
+    (0 picks a free one). returns the asyncio server """
+    if path is not None:
+        return await asyncio.start_unix_server(service.handle, path)
+    return await asyncio.start_server(service.handle, host, port)
+
+
+class ServiceError(Exception):
+    """ a request the service answered with an error. reply is the whole
+    reply, e.g. with the pending count when the error is 'busy' """
+
+    def __init__(self, reply):
+        Exception.__init__(self, reply.get('error'))
+        self.reply = reply
+
+
+class ServiceClient(object):
+    """ blocking client for a service at address, a unix socket path or a
+    (host, port) pair """
+
+    def __init__(self, address):
+        family = socket.AF_UNIX if isinstance(address, str) else \
+            socket.AF_INET
+        self.socket = socket.socket(family, socket.SOCK_STREAM)
+        self.socket.connect(address)
+        self.file = self.socket.makefile('rwb')
+
+    def request(self, **request):
+        """ sends request and returns the reply, raising ServiceError if it
+        isn't ok """
+        self.file.write((json.dumps(request) + '\n').encode())
+        self.file.flush()
+        line = self.file.readline()
+        if not line:
+            raise ServiceError({'error': 'connection closed'})
+        reply = json.loads(line.decode())
+        if not reply.get('ok'):
+            raise ServiceError(reply)
+        return reply
+
+    def load(self, case_id, casefile):
+        return self.request(op='load', id=case_id,
+                            casefile=os.path.abspath(casefile))
+
+    def unload(self, case_id):
+        return self.request(op='unload', id=case_id)
+
+    def stats(self):
+        return self.request(op='stats')
+
+    def solve(self, case_id, demands=None):
+        """ solves a loaded case, with demands ({bus: P + jQ}, external
+        numbering) overriding its own, and returns the answer as solve does
+        """
+        overrides = {str(bus): [float(real(d)), float(imag(d))]
+                     for bus, d in (demands or {}).items()}
+        reply = self.request(op='solve', id=case_id, demands=overrides)
+        return dict(zip(reply['buses'], zip(reply['V'], reply['theta'])))
+
+    def close(self):
+        self.file.close()
+        self.socket.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+class LocalService(object):
+    """ runs a SolveService on a temporary unix socket in a background
+    thread, for the length of a with block:
+
+        with LocalService(backend='clarabel') as service:
+            with service.client() as client:
+                client.load('feeder', 'cases/case85_v2.m')
+    """
+
+    def __init__(self, **options):
+        self.service = SolveService(**options)
+        self.directory = mkdtemp(prefix='jabr-service-')
+        self.address = os.path.join(self.directory, 'socket')
+        self.loop = asyncio.new_event_loop()
+        self.thread = threading.Thread(target=self.loop.run_forever)
+        self.thread.daemon = True
+
+    def client(self):
+        return ServiceClient(self.address)
+
+    def __enter__(self):
+        self.thread.start()
+        self.server = asyncio.run_coroutine_threadsafe(
+            start_server(self.service, self.address), self.loop).result()
+        return self
+
+    def __exit__(self, *exc):
+        self.server.close()
+        asyncio.run_coroutine_threadsafe(self.server.wait_closed(),
+                                         self.loop).result()
+        self.loop.call_soon_threadsafe(self.loop.stop)
+        self.thread.join()
+        self.loop.close()
+        self.service.executor.shutdown()
+        if os.path.exists(self.address):
+            os.remove(self.address)
+        os.rmdir(self.directory)
+
+
+if __name__ == '__main__':
+    from argparse import ArgumentParser
+    parser = ArgumentParser(description=__doc__.split('\n\n')[0])
+    parser.add_argument('--socket', default=None,
+                        help='unix socket path (default: TCP on localhost)')
+    parser.add_argument('--port', type=int, default=8765)
+    parser.add_argument('--backend', default='gurobi')
+    parser.add_argument('--workers', type=int, default=None)
+    parser.add_argument('--max-pending', type=int, default=64)
+    args = parser.parse_args()
+    service = SolveService(args.backend, args.workers, args.max_pending)
+
+    async def main():
+        server = await start_server(service, args.socket, port=args.port)
+        print('serving on %s' % (args.socket or 'localhost:%d' % args.port))
+        async with server:
+            await server.serve_forever()
+
+    asyncio.run(main())
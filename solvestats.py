@@ -0,0 +1,135 @@
+""" per-stage timings and solver statistics of a solve, see jabr.solve(...,
+stats=True). every hook added with add_hook is called with the SolveStats of
+every solve in this process once it finishes, whether or not it succeeded,
+e.g. to forward them to a metrics system:
+
+    add_hook(lambda stats: metrics.timing('jabr', stats.as_dict()))
+"""
+from __future__ import division, print_function
+from contextlib import contextmanager
+from time import time
+from numpy import add, asarray, maximum, sqrt
+from backends import cone_heads
+
+
+HOOKS = []
+
+
+def add_hook(hook):
+    """ calls hook(stats) after every solve """
+    HOOKS.append(hook)
+
+
+def remove_hook(hook):
+    HOOKS.remove(hook)
+
+
+class SolveStats(object):
+    """ what one solve spent its time on and how the solver did.
+
+    stages: (name, seconds) in the order they ran, out of load_case, cache,
+        screen, sweep, constraint_matrix, model_build, optimize, triage,
+        refine, recover and verify
+    n, rows, cols, nnz, cones: buses, and the conic problem's constraint
+        rows, variables, constraint matrix nonzeros and second order cones
+    method, backend, status: what was asked for and how it ended ('optimal',
+        the backend's status, 'screened', 'cached' or the sweep's
+        'converged')
+    iterations, solve_time: the backend's iteration count and its own
+        timing of the optimize call (the barrier, for gurobi)
+    primal_residual, dual_residual: the largest violation of Ax + s = b, s in
+        K and of A'z + c = 0 at the solution, None where not available
+    exact, max_mismatch, max_slack: the outcome of solve(..., check=True),
+        see verify.py, None without it
+    phase: with solve(..., accuracy=...), 'loose' or 'tight', the phase
+        whose answer was kept, see accuracy.py
+    """
+
+    def __init__(self, method='socp', backend='gurobi'):
+        self.stages = []
+        self.method, self.backend = method, backend
+        self.n = self.rows = self.cols = self.nnz = self.cones = None
+        self.status = self.iterations = self.solve_time = None
+        self.primal_residual = self.dual_residual = None
+        self.exact = self.max_mismatch = self.max_slack = None
+        self.phase = None
+
+    @contextmanager
+    def stage(self, name):
+        """ times the body of a with statement as stage name """
+        start = time()
+        try:
+            yield
+        finally:
+            self.stages.append((name, time() - start))
+
+    @property
+    def seconds(self):
+        """ dictionary of stage name to seconds """
+        return dict(self.stages)
+
+    @property
+    def total(self):
+        return sum(seconds for _, seconds in self.stages)
+
+    def record_problem(self, problem):
+        self.rows, self.cols = problem.A.shape
+        self.nnz = problem.A.nnz
+        self.cones = len(problem.soc)
+
+    def record_solution(self, problem, solution):
+        self.status = solution.status
+        self.iterations = int(solution.iterations)
+        self.solve_time = solution.solve_time
+        if solution.x is not None:
+            self.primal_residual, self.dual_residual = residuals(problem,
+                                                                 solution)
+
+    def record_verification(self, verification):
+        self.exact = verification.exact
+        self.max_mismatch = verification.max_mismatch
+        self.max_slack = verification.max_slack
+
+    def as_dict(self):
+        """ everything as a flat dictionary of plain values, the stages as
+        <name>_seconds """
+        result = {'%s_seconds' % name: seconds
+                  for name, seconds in self.stages}
+        result.update((name, getattr(self, name)) for name in (
+            'method', 'backend', 'n', 'rows', 'cols', 'nnz', 'cones', 'status',
+            'iterations', 'solve_time', 'primal_residual', 'dual_residual',
+            'exact', 'max_mismatch', 'max_slack', 'phase'))
+        result['total_seconds'] = self.total
+        return result
+
+    def __repr__(self):
+        return 'SolveStats(%s)' % ', '.join(
+            '%s=%r' % item for item in sorted(self.as_dict().items()))
+
+
+def residuals(problem, solution):
+    """ the largest violation of the primal constraints (Ax + s = b with s in
+    the cones) at solution.x, and of the dual equation A'z + c = 0 at
+    solution.dual (None if the backend gave no dual) """
+    s = problem.b - problem.A.dot(solution.x)
+    z, k = problem.zero, problem.zero + problem.nonneg
+    violations = [abs(s[:z]).max() if z else 0., (-s[z:k]).max() if k > z
+                  else 0.]
+    if len(problem.soc):
+        heads, _ = cone_heads(problem)
+        heads = heads - k
+        cones = s[k:]
+        norms = sqrt(maximum(add.reduceat(cones*cones, heads) -
+                             cones[heads]**2, 0))
+        violations.append((norms - cones[heads]).max())
+    dual = None
+    if solution.dual is not None:
+        dual = float(abs(problem.A.T.dot(asarray(solution.dual)) +
+                         problem.c).max())
+    return max(0., float(max(violations))), dual
+
+
+def report(stats, hook=None):
+    """ passes stats to hook, if given, then to every added hook """
+    for each in ([hook] if hook is not None else []) + HOOKS:
+        each(stats)
@@ -0,0 +1,46 @@
+""" backward/forward sweep power flow for radial networks. much cheaper than
+the Jabr SOCP when it converges, but it only handles a single (slack)
+generator and gives no certificate when it doesn't
+"""
+from __future__ import division, print_function
+from numpy import asarray, ones, zeros, conj, isfinite, add, abs, angle
+from topology import Topology
+
+
+def sweep(f, t, g, b, demands, vhat, tol=1e-9, max_iter=100, topology=None):
+    """ current summation sweep. f, t, g, b are the branch arrays from
+    jabr.branch_arrays, demands the complex bus loads and vhat the root
+    voltage, all in internal numbering. topology is the Topology of f and t,
+    case.topology for a Case's own arrays, and is built if not given.
+    returns the complex bus voltages, or None if the sweep hasn't converged
+    after max_iter passes """
+    S = asarray(demands, dtype=complex)
+    n = len(S)
+    if topology is None:
+        topology = Topology(f, t, n)
+    parent, tiers = topology.parent, topology.levels[1:]
+    z = zeros(n, dtype=complex)
+    z[topology.child] = 1/(g + 1j*b)
+    V = vhat*ones(n, dtype=complex)
+    for _ in range(max_iter):
+        J = conj(S/V)
+        for tier in reversed(tiers):
+            add.at(J, parent[tier], J[tier])
+        V_old = V.copy()
+        for tier in tiers:
+            V[tier] = V[parent[tier]] - z[tier]*J[tier]
+        if not isfinite(V).all() or (abs(V) < 1e-3*vhat).any():
+            return None
+        if abs(V - V_old).max() < tol:
+            return V
+    return None
+
+
+def sweep_voltages(f, t, g, b, demands, vhat, tol=1e-9, max_iter=100,
+                   topology=None):
+    """ like sweep, but returns voltage magnitudes and angles (radians) as
+    recover_original_variables does, or None, None """
+    V = sweep(f, t, g, b, demands, vhat, tol, max_iter, topology)
+    if V is None:
+        return None, None
+    return abs(V), angle(V)
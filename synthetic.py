@@ -0,0 +1,84 @@
+""" seeded random radial feeders, for testing and benchmarking at sizes far
+beyond the cases directory. python synthetic.py n [casefile] writes one out
+as a matpower file
+"""
+from __future__ import division, print_function
+from numpy import arange, zeros
+from numpy.random import RandomState
+from loadcase import Case, Gen
+from topology import Topology
+
+
+def random_tree(n, branching=3, depth=None, seed=0):
+    """ returns the parent of every bus of a random tree on n buses, rooted at
+    bus 0 (parent -1), where each bus has at most branching children and
+    parent[i] < i. if depth is given, buses 1 to depth form a trunk down from
+    the root and every other bus hangs off a random bus less than depth
+    branches deep, so the tree is exactly depth branches deep. raises
+    ValueError if n buses don't fit """
+    if branching < 1:
+        raise ValueError("branching must be at least 1")
+    rs = RandomState(seed)
+    draws = rs.random_sample(n)
+    parent = zeros(n, dtype=int)
+    parent[0] = -1
+    level = zeros(n, dtype=int)
+    children = zeros(n, dtype=int)
+    trunk = min(n - 1, depth or 0)
+    parent[1:trunk+1] = arange(trunk)
+    level[1:trunk+1] = arange(1, trunk+1)
+    children[:trunk] = 1
+    # buses that can still take a child, removed by swapping with the last
+    open_buses = [bus for bus in range(trunk + 1)
+                  if children[bus] < branching and
+                  (depth is None or level[bus] < depth)]
+    for bus in range(trunk + 1, n):
+        if not open_buses:
+            raise ValueError("%d buses don't fit in a tree with branching %d "
+                             "and depth %s" % (n, branching, depth))
+        k = int(draws[bus]*len(open_buses))
+        above = open_buses[k]
+        parent[bus] = above
+        level[bus] = level[above] + 1
+        children[above] += 1
+        if children[above] == branching:
+            open_buses[k] = open_buses[-1]
+            open_buses.pop()
+        if depth is None or level[bus] < depth:
+            open_buses.append(bus)
+    return parent
+
+
+def random_feeder(n, branching=3, depth=None, seed=0, load=1., drop=.05):
+    """ a random radial Case on n buses (see random_tree) with the root as the
+    only generator, at 1 p.u. the total real demand is load, spread randomly
+    over the other buses, with power factors between 0.86 and 0.98. branch
+    x/r ratios are between 0.5 and 2, and the impedances are scaled so the
+    largest linearized voltage drop from the root, the sum of r*P + x*Q down
+    the path with P + jQ the demand downstream of each branch, is drop """
+    parent = random_tree(n, branching, depth, seed)
+    rs = RandomState(seed + 1)
+    f, t = parent[1:], arange(1, n)
+    r = rs.uniform(.5, 1.5, n - 1)
+    x = r*rs.uniform(.5, 2, n - 1)
+    demand = zeros(n, dtype=complex)
+    P = rs.uniform(0, 1, n - 1)
+    demand[1:] = load*P/P.sum()*(1 + 1j*rs.uniform(.2, .6, n - 1))
+    topology = Topology(f, t, n)
+    below = topology.subtree_sum(demand)[t]
+    step = zeros(n)
+    step[t] = r*below.real + x*below.imag
+    worst = topology.path_sum(step).max()
+    scale = drop/worst if worst > 0 else 1.
+    y = 1/(scale*(r + 1j*x))
+    return Case(f, t, y.real, y.imag, demand, 1., arange(1, n + 1),
+                {0: Gen(load, 1.)})
+
+
+if __name__ == '__main__':
+    import sys
+    from loadcase import save_case
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 1000
+    casefile = sys.argv[2] if len(sys.argv) > 2 else 'case%d_random.m' % n
+    save_case(random_feeder(n), casefile)
+    print('wrote %s' % casefile)
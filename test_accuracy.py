@@ -0,0 +1,81 @@
+import pytest
+from accuracy import *
+from backends import BACKENDS, solve_conic
+from jabr import build_conic_problem, solve_case
+from loadcase import load_case
+from resultcache import ResultCache
+from numpy.testing import assert_almost_equal
+
+
+CASE_DIRECTORY = '/Users/srharnett/Dropbox/power/jabr-power-flow/cases/'
+
+
+@pytest.fixture
+def case85():
+    pytest.importorskip('clarabel')
+    return load_case(CASE_DIRECTORY + 'case85_v2.m')
+
+
+def test_loose_tolerance_is_cheaper(case85):
+    problem = build_conic_problem(case85)
+    loose = solve_conic(problem, 'clarabel', tol=1e-5)
+    tight = solve_conic(problem, 'clarabel')
+    assert loose.status == tight.status == 'optimal'
+    assert loose.iterations < tight.iterations
+
+
+def test_settled_loose(case85):
+    # limits far from every voltage: the loose answer is kept
+    policy = TwoPhase(vmin=.5, vmax=1.5)
+    result, stats = solve_case(case85, 'clarabel', arrays=True, stats=True,
+                               accuracy=policy)
+    assert stats.phase == 'loose'
+    assert 'refine' not in stats.seconds
+    assert policy.counters() == {'loose': 1, 'tight': 0, 'borderline': 0,
+                                 'suspicious': 0, 'loose_rate': 1.}
+    expected = solve_case(case85, 'clarabel', arrays=True)
+    assert_almost_equal(result.V, expected.V, decimal=2)
+
+
+def test_borderline_refined(case85):
+    expected = solve_case(case85, 'clarabel', arrays=True)
+    # a limit right at the lowest voltage makes the case borderline
+    policy = TwoPhase(vmin=expected.V.min())
+    result, stats = solve_case(case85, 'clarabel', arrays=True, stats=True,
+                               accuracy=policy)
+    assert stats.phase == 'tight'
+    assert 'refine' in stats.seconds
+    assert (policy.loose, policy.borderline, policy.tight) == (0, 1, 1)
+    assert_almost_equal(result.V, expected.V, decimal=6)
+
+
+def test_suspicious_refined(case85):
+    # an exactness check no loose answer can pass
+    policy = TwoPhase(vmin=.5, vmax=1.5, max_mismatch=0)
+    solve_case(case85, 'clarabel', accuracy=policy)
+    assert policy.suspicious == 1
+    assert policy.loose_rate == 0
+
+
+def test_cache_key_includes_policy(case85):
+    cache = ResultCache()
+    assert (cache.key(case85, 'clarabel') !=
+            cache.key(case85, 'clarabel', accuracy=TwoPhase()))
+    assert (cache.key(case85, 'clarabel', accuracy=TwoPhase()) ==
+            cache.key(case85, 'clarabel', accuracy=TwoPhase()))
+
+
+@pytest.mark.parametrize('backend', sorted(BACKENDS))
+def test_backend_set_tol(backend):
+    problem = build_conic_problem(load_case(CASE_DIRECTORY + 'case15_v2.m'))
+    try:
+        solver = BACKENDS[backend](problem, tol=1e-5)
+    except ImportError:
+        pytest.skip('%s not installed' % backend)
+    except Exception as e:  # e.g. a size-limited gurobi licence
+        pytest.skip(str(e))
+    loose = solver.solve()
+    solver.set_tol(None)
+    tight = solver.solve()
+    assert loose.status == tight.status == 'optimal'
+    assert_almost_equal(loose.x, tight.x, decimal=3)
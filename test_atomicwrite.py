@@ -0,0 +1,28 @@
+import os
+import pytest
+from atomicwrite import *
+
+
+def test_atomic_write(tmpdir):
+    path = str(tmpdir.join('out.bin'))
+    with atomic_write(path) as fileobj:
+        fileobj.write(b'first')
+        assert not os.path.exists(path)
+    with atomic_write(path) as fileobj:
+        fileobj.write(b'second')
+    with open(path, 'rb') as fileobj:
+        assert fileobj.read() == b'second'
+    assert os.listdir(str(tmpdir)) == ['out.bin']
+
+
+def test_atomic_write_fails(tmpdir):
+    path = str(tmpdir.join('out.bin'))
+    with atomic_write(path) as fileobj:
+        fileobj.write(b'first')
+    with pytest.raises(RuntimeError):
+        with atomic_write(path) as fileobj:
+            fileobj.write(b'partial')
+            raise RuntimeError
+    with open(path, 'rb') as fileobj:
+        assert fileobj.read() == b'first'
+    assert os.listdir(str(tmpdir)) == ['out.bin']
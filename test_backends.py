@@ -0,0 +1,143 @@
+import pytest
+from copy import deepcopy
+from jabr import *
+from backends import *
+from loadcase import load_case, z2y
+from numpy import array, real, imag
+from numpy.testing import assert_almost_equal
+
+
+CASE_DIRECTORY = '/Users/srharnett/Dropbox/power/jabr-power-flow/cases/'
+
+MODULES = {'gurobi': 'gurobipy', 'clarabel': 'clarabel', 'scs': 'scs',
+           'ecos': 'ecos'}
+
+
+@pytest.fixture
+def case5():
+    c = CASE_DIRECTORY + 'case5_renumber_tree.m'
+    return load_case(c)
+
+
+@pytest.fixture
+def case14():
+    c = CASE_DIRECTORY + 'case14_tree.m'
+    return load_case(c)
+
+
+def test_conic_problem_dimensions(case5):
+    problem = build_conic_problem(case5)
+    n, m = 5, 4
+    assert problem.A.shape == (1 + 2*m + 5*m, n + 2*m)
+    assert problem.zero == 1 + 2*m
+    assert problem.nonneg == m
+    assert problem.soc == [4]*m
+    assert len(problem.b) == problem.A.shape[0]
+    assert len(problem.c) == problem.A.shape[1]
+
+
+def test_unknown_backend(case5):
+    with pytest.raises(ValueError):
+        solve_jabr(case5, 'cplex')
+
+
+@pytest.mark.parametrize('backend', ['gurobi', 'clarabel', 'ecos'])
+def test_backend_case5(case5, backend):
+    pytest.importorskip(MODULES[backend])
+    V = {5: 1, 1: 0.85332805, 2: 0.98467413, 3: 0.87294854, 4: 0.85332805}
+    u, R, I, solution = solve_jabr(case5, backend)
+    Vhat, theta = recover_original_variables(u, I)
+    for bus, v in enumerate(Vhat):
+        assert_almost_equal(V[case5.i2e[bus]], v, decimal=4)
+    assert solution.backend == backend
+    assert solution.status == 'optimal'
+    assert solution.iterations > 0
+
+
+def test_gurobi_duals_opt_in(case5):
+    pytest.importorskip('gurobipy')
+    problem = build_conic_problem(case5)
+    assert solve_conic(problem, 'gurobi').dual is None
+    solution = solve_conic(problem, 'gurobi', duals=True)
+    assert len(solution.dual) == problem.A.shape[0]
+
+
+@pytest.mark.parametrize('backend', ['gurobi', 'clarabel', 'ecos'])
+def test_backend_case14(case14, backend):
+    pytest.importorskip(MODULES[backend])
+    V = [0, 1.06000, 1.04500, 1.01000, 0.98737, 0.99732, 1.07000, 1.00938,
+         1.09000, 0.97570, 0.96766, 1.06350, 1.05898, 1.05428, 0.94052]
+    u, R, I, _ = solve_jabr(case14, backend)
+    Vhat, theta = recover_original_variables(u, I)
+    for bus, v in enumerate(Vhat):
+        assert_almost_equal(V[case14.i2e[bus]], v, decimal=4)
+
+
+@pytest.mark.parametrize('backend', ['gurobi', 'clarabel', 'scs', 'ecos'])
+def test_jabr_solver_updates(case14, backend):
+    pytest.importorskip(MODULES[backend])
+    solver = JabrSolver(case14, backend)
+    u0, _, _, _ = solver.solve()
+    changed = deepcopy(case14)
+    for scale, vhat in [(0.5, 1.06), (1.2, 1.02), (1, 1.06)]:
+        changed.demands = list(scale*array(case14.demands))
+        changed.vhat = vhat
+        solver.update_demands(real(changed.demands), imag(changed.demands))
+        solver.update_slack_voltage(vhat)
+        u, R, I, _ = solver.solve()
+        u_hat, R_hat, I_hat, _ = solve_jabr(changed, backend)
+        assert_almost_equal(u, u_hat, decimal=4)
+        for key in R:
+            assert_almost_equal(R[key], R_hat[key], decimal=4)
+            assert_almost_equal(I[key], I_hat[key], decimal=4)
+    assert_almost_equal(u, u0, decimal=4)
+
+
+def changed_branches(case, branches, r, x):
+    """ a fresh copy of case with branches changed to r + jx """
+    changed = deepcopy(case)
+    changed.g[branches], changed.b[branches] = z2y(array(r), array(x))
+    return changed
+
+
+@pytest.mark.parametrize('backend', ['gurobi', 'clarabel', 'scs', 'ecos'])
+def test_jabr_solver_update_branches(case14, backend):
+    pytest.importorskip(MODULES[backend])
+    solver = JabrSolver(case14, backend)
+    solver.solve()
+    # branch 0 is at the root, 5 (twice, the last one counts) at a generator
+    branches = [0, 5, 9, 5]
+    z = array([.9, 1.1, 1.2, .8])/(case14.g + 1j*case14.b)[branches]
+    r, x = real(z), imag(z)
+    solver.update_branches(branches, r, x)
+    changed = changed_branches(case14, branches, r, x)
+    if hasattr(solver.backend_solver, 'A'):
+        A = build_conic_problem(changed).A
+        assert (solver.backend_solver.A != A).nnz == 0
+    u, R, I, _ = solver.solve()
+    u_hat, R_hat, I_hat, _ = JabrSolver(changed, backend).solve()
+    assert_almost_equal(u, u_hat, decimal=4 if backend == 'scs' else 6)
+    for key in R:
+        assert_almost_equal(R[key], R_hat[key], decimal=4)
+        assert_almost_equal(I[key], I_hat[key], decimal=4)
+    assert_almost_equal(solver.g, changed.g)
+    assert (case14.g != changed.g).any()  # the case itself is unchanged
+
+
+def test_update_branch_identical_to_fresh_build(case14):
+    pytest.importorskip('ecos')
+    solver = JabrSolver(case14, 'ecos')
+    z = 1.1/(case14.g[7] + 1j*case14.b[7])
+    solver.update_branch(7, z.real, z.imag)
+    fresh = JabrSolver(changed_branches(case14, [7], [z.real], [z.imag]),
+                       'ecos')
+    assert (solver.optimize().x == fresh.optimize().x).all()
+
+
+def test_set_entries():
+    from scipy.sparse import csc_matrix
+    A = csc_matrix(array([[1., 0], [2., 3.]]))
+    assert list(set_entries(A, [1, 0], [1, 0], [5, 6])) == [2, 0]
+    assert A.toarray().tolist() == [[6, 0], [2, 5]]
+    assert set_entries(A, [0], [1], [7]) is None  # not stored before
+    assert A.toarray().tolist() == [[6, 7], [2, 5]]
@@ -0,0 +1,33 @@
+import pytest
+from batch import *
+from jabr import solve
+from loadcase import load_case
+from numpy.testing import assert_almost_equal
+
+
+CASE_DIRECTORY = '/Users/srharnett/Dropbox/power/jabr-power-flow/cases/'
+
+
+def test_solve_many():
+    cases = [CASE_DIRECTORY + 'case5_renumber_tree.m',
+             CASE_DIRECTORY + 'case15_og.m',
+             load_case(CASE_DIRECTORY + 'case9_tree.m'),
+             CASE_DIRECTORY + 'no_such_case.m']
+    outcomes = sorted(solve_many(cases, workers=2))
+    assert [o.index for o in outcomes] == [0, 1, 2, 3]
+    for i in (0, 2):
+        assert outcomes[i].error is None
+    expected = solve(CASE_DIRECTORY + 'case9_tree.m')
+    for bus, vt in expected.items():
+        assert_almost_equal(outcomes[2].answer[bus], vt, decimal=6)
+    assert outcomes[1].answer is None
+    assert outcomes[1].error.startswith('Infeasible')
+    assert outcomes[3].answer is None
+    assert outcomes[3].error is not None
+
+
+def test_solve_many_threads():
+    cases = [CASE_DIRECTORY + 'case5_renumber_tree.m'] * 3
+    outcomes = list(solve_many(cases, workers=3, threads=1, method='sweep'))
+    assert sorted(o.index for o in outcomes) == [0, 1, 2]
+    assert all(o.error is None for o in outcomes)
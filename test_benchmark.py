@@ -0,0 +1,23 @@
+import pytest
+from benchmark import *
+
+
+def test_bench_case(tmpdir):
+    pytest.importorskip('clarabel')
+    casefile = str(tmpdir.join('case200_random.m'))
+    save_case(random_feeder(200), casefile)
+    result = bench_case(casefile, 'clarabel')
+    assert result['n'] == 200
+    assert result['status'] == 'optimal'
+    assert sorted(result['stages']) == sorted(STAGES)
+    for stage in STAGES:
+        assert result['stages'][stage]['seconds'] >= 0
+        assert result['stages'][stage]['peak_bytes'] > 0
+
+
+def test_run(tmpdir):
+    pytest.importorskip('clarabel')
+    report = run([50, 100], 'clarabel', directory=str(tmpdir))
+    assert [result['n'] for result in report['results']] == [50, 100]
+    assert all(result['status'] == 'optimal' for result in report['results'])
+    assert json.loads(json.dumps(report)) == report
@@ -0,0 +1,70 @@
+import pytest
+from casestore import *
+from batch import solve_many
+from jabr import solve_case
+from loadcase import load_case
+from numpy import arange, outer, shares_memory
+from numpy.testing import assert_array_equal
+
+
+CASE_DIRECTORY = '/Users/srharnett/Dropbox/power/jabr-power-flow/cases/'
+
+
+@pytest.fixture
+def case85():
+    return load_case(CASE_DIRECTORY + 'case85_v2.m')
+
+
+@pytest.fixture
+def store(case85, tmpdir):
+    storefile = str(tmpdir.join('case85.jabr'))
+    demands = outer(1 + .1*arange(4), case85.demand)
+    write_store(storefile, case85, demands)
+    return storefile
+
+
+def test_round_trip(case85, store):
+    view = load_case(store)
+    for name in ('f', 't', 'g', 'b', 'ext', 'demand'):
+        assert_array_equal(getattr(view, name), getattr(case85, name))
+    assert view.vhat == case85.vhat
+    assert view.gens == case85.gens
+    assert (view.adjacency != case85.adjacency).nnz == 0
+    assert view.branch_index(0, 1) == case85.branch_index(0, 1)
+    assert_array_equal(view.topology.parent, case85.topology.parent)
+
+
+def test_scenarios_share_one_map(case85, store):
+    cases = CaseStore(store)
+    assert cases.scenarios == 4
+    first, last = cases.case(0), cases.case(3)
+    assert_array_equal(last.demand, 1.3*case85.demand)
+    assert shares_memory(first.g, last.g)
+    assert shares_memory(first.demand, cases.buffer)
+    assert shares_memory(cases.adjacency.data, cases.buffer)
+
+
+def test_read_only(store):
+    view = load_case(store, scenario=2)
+    with pytest.raises(ValueError):
+        view.demand[3] = 0
+    with pytest.raises(ValueError):
+        view.g[0] = 0
+
+
+def test_not_a_store(tmpdir):
+    path = tmpdir.join('junk')
+    path.write('nothing')
+    with pytest.raises(ValueError):
+        CaseStore(str(path))
+
+
+def test_solve_scenarios(case85, store):
+    pytest.importorskip('clarabel')
+    expected = solve_case(case85, 'clarabel')
+    assert solve_case(load_case(store), 'clarabel') == pytest.approx(
+        expected)
+    outcomes = sorted(solve_many([(store, k) for k in range(4)], workers=2,
+                                 backend='clarabel'))
+    assert [outcome.tag for outcome in outcomes] == ['solved']*4
+    assert outcomes[0].answer == expected
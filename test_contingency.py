@@ -0,0 +1,95 @@
+import pytest
+from contingency import *
+from jabr import branch_constraint_matrix, solve_case
+from loadcase import load_case
+from numpy import isnan
+from numpy.testing import assert_almost_equal
+
+
+CASE_DIRECTORY = '/Users/srharnett/Dropbox/power/jabr-power-flow/cases/'
+
+
+@pytest.fixture
+def case14():
+    return load_case(CASE_DIRECTORY + 'case14_tree.m')
+
+
+def test_island_labels(case14):
+    topology = case14.topology
+    k = topology.parent_branch[8]
+    label = island_labels(case14, [k])
+    assert sorted(flatnonzero(label == 8)) == sorted(topology.subtree(8))
+    assert (label[label != 8] == 0).all()
+
+
+@pytest.mark.parametrize('outage', [(0,), (3,), (5, 8), (1, 2, 9), (5, 8, 5)])
+def test_island_matrices(case14, outage):
+    matrices = branch_constraint_matrix(case14.n, case14.f, case14.t,
+                                        case14.g, case14.b)
+    label = island_labels(case14, outage)
+    same = label[case14.f] == label[case14.t]
+    for top in unique(label):
+        buses = flatnonzero(label == top)
+        sources = [bus for bus in buses if bus in case14.gens]
+        if not sources:
+            continue
+        buses = concatenate([[min(sources)], buses[buses != min(sources)]])
+        branches = flatnonzero(same & (label[case14.f] == top))
+        island, branches = island_case(case14, buses, branches)
+        Areal, Areac = island_matrices(case14, matrices, buses, branches,
+                                       outage)
+        Areal_hat, Areac_hat = branch_constraint_matrix(
+            island.n, island.f, island.t, island.g, island.b)
+        assert_almost_equal(Areal.toarray(), Areal_hat.toarray())
+        assert_almost_equal(Areac.toarray(), Areac_hat.toarray())
+
+
+def test_run_contingencies(case14):
+    outages = [0, 5, (5, 8)]
+    results = run_contingencies(case14, outages, workers=2)
+    assert [c.outage for c in results] == [(0,), (5,), (5, 8)]
+    assert [c.index for c in results] == [0, 1, 2]
+    for contingency in results:
+        assert contingency.status == 'solved'
+        outage = contingency.outage
+        label = island_labels(case14, outage)
+        assert len(contingency.islands) == len(unique(label))
+        covered = concatenate([island.buses for island in
+                               contingency.islands])
+        assert sorted(covered) == list(range(case14.n))
+        V, theta = voltages(contingency, case14.n)
+        for top in unique(label):
+            buses = flatnonzero(label == top)
+            sources = [bus for bus in buses if bus in case14.gens]
+            if not sources:
+                assert (V[buses] == 0).all()
+                continue
+            buses = concatenate([[min(sources)], buses[buses != min(sources)]])
+            branches = flatnonzero((label[case14.f] == top) &
+                                   (label[case14.t] == top))
+            island, _ = island_case(case14, buses, branches)
+            if island.n == 1:
+                assert_almost_equal(V[buses], island.vhat)
+                continue
+            answer = solve_case(island)
+            for i, bus in enumerate(buses):
+                v, t = answer[case14.i2e[bus]]
+                assert_almost_equal(V[bus], v, decimal=5)
+                assert_almost_equal(theta[bus], t, decimal=5)
+
+
+def test_iter_contingencies_in_process(case14):
+    results = list(iter_contingencies(case14, workers=1))
+    assert [c.outage for c in results] == [(k,) for k in range(13)]
+    parallel = run_contingencies(case14, workers=2)
+    for a, b in zip(results, parallel):
+        assert_almost_equal(voltages(a, case14.n)[0],
+                            voltages(b, case14.n)[0])
+
+
+def test_run_contingencies_infeasible():
+    case = load_case(CASE_DIRECTORY + 'case15_og.m')
+    contingency, = run_contingencies(case, [len(case.f) - 1], workers=1)
+    assert contingency.status == 'infeasible'
+    assert any(island.V is None for island in contingency.islands)
+    assert isnan(voltages(contingency, case.n)[0]).any()
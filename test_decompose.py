@@ -0,0 +1,68 @@
+import pytest
+from decompose import *
+from jabr import solve_case
+from loadcase import load_case
+from numpy import sort, concatenate
+from numpy.testing import assert_almost_equal
+
+pytest.importorskip('clarabel')
+
+CASE_DIRECTORY = '/Users/srharnett/Dropbox/power/jabr-power-flow/cases/'
+
+
+@pytest.fixture
+def case15():
+    return load_case(CASE_DIRECTORY + 'case15_v2.m')
+
+
+def test_partition(case15):
+    boundary = partition(case15, 4)
+    assert len(boundary) == 3
+    pieces = subtrees(case15, boundary)
+    assert pieces[0].buses[0] == 0 and pieces[0].inlet == -1
+    assert sorted(piece.inlet for piece in pieces[1:]) == boundary
+    own = concatenate([pieces[0].buses] + [p.buses[1:] for p in pieces[1:]])
+    assert list(sort(own)) == list(range(case15.n))
+    for piece in pieces[1:]:
+        assert piece.case.n == len(piece.buses)
+        assert case15.topology.parent[piece.buses[1]] == piece.buses[0]
+
+
+@pytest.mark.parametrize('name, parts, workers', [
+    ('case5_renumber_tree.m', 8, 1), ('case15_v2.m', 4, 1),
+    ('case15_v2.m', 8, 2), ('case85_v2.m', 4, 1), ('case9_tree.m', 4, 2),
+    ('case14_matpower.m', 4, 2)])
+def test_decompose_matches_solve(name, parts, workers):
+    case = load_case(CASE_DIRECTORY + name)
+    expected = solve_case(case, backend='clarabel')
+    answer = solve_decomposed(case, parts, workers=workers, backend='clarabel')
+    assert sorted(answer) == sorted(expected)
+    for bus, (v, t) in expected.items():
+        assert_almost_equal(answer[bus], (v, t), decimal=6)
+
+
+def test_decompose_infeasible():
+    case = load_case(CASE_DIRECTORY + 'case15_og.m')
+    result = decompose(case, partition(case, 4), 1, 'clarabel')
+    assert result.status == 'infeasible'
+    with pytest.raises(ValueError):
+        solve_decomposed(case, 4, workers=1, backend='clarabel')
+
+
+def test_decompose_max_rounds(case15):
+    boundary = partition(case15, 4)
+    result = decompose(case15, boundary, 1, 'clarabel', max_rounds=1)
+    assert (result.status, result.rounds) == ('max_rounds', 1)
+    with pytest.raises(ValueError):
+        decompose(case15, boundary, 1, 'clarabel', max_rounds=0)
+
+
+def test_decompose_with_generators():
+    case = load_case(CASE_DIRECTORY + 'case118_v2.m')
+    expected = solve_case(case, backend='clarabel')
+    result = decompose(case, partition(case, 4), 1, 'clarabel', damping=.6)
+    assert result.status == 'optimal'
+    assert result.gap < 1e-6
+    i2e = case.i2e
+    for i, (v, t) in enumerate(zip(result.V, result.theta)):
+        assert_almost_equal((v, t), expected[i2e[i]], decimal=6)
@@ -0,0 +1,70 @@
+import pytest
+from flowresult import *
+from jabr import solve, solve_case
+from loadcase import load_case
+from resultcache import ResultCache
+from numpy import genfromtxt, real
+from numpy.testing import assert_almost_equal, assert_array_equal
+
+
+CASE_DIRECTORY = '/Users/srharnett/Dropbox/power/jabr-power-flow/cases/'
+
+
+@pytest.fixture
+def case14():
+    pytest.importorskip('clarabel')
+    return load_case(CASE_DIRECTORY + 'case14_tree.m')
+
+
+def test_arrays_match_dict(case14):
+    answer = solve_case(case14, 'clarabel')
+    result = solve_case(case14, 'clarabel', arrays=True)
+    assert result.to_dict() == answer
+    assert result.n == 14
+    assert len(result.R) == len(result.I) == len(result.S_from) == 13
+    # the SOCP's own u, R, I agree with those implied by V and theta
+    derived = FlowResult.from_solution(case14, result.V, result.theta)
+    assert_almost_equal(derived.u, result.u, decimal=6)
+    assert_almost_equal(derived.R, result.R, decimal=6)
+    assert_almost_equal(derived.I, result.I, decimal=6)
+
+
+def test_flows_balance(case14):
+    result = solve_case(case14, 'clarabel', arrays=True)
+    # power out of every bus into its branches is its injection, -demand
+    outflow = real(case14.demand)
+    for k, (f, t) in enumerate(zip(case14.f, case14.t)):
+        outflow[f] += real(result.S_from[k])
+        outflow[t] += real(result.S_to[k])
+    assert_almost_equal(outflow[1:], 0, decimal=5)
+    assert (real(result.S_from + result.S_to) >= -1e-9).all()  # losses
+
+
+def test_sweep_and_cache(case14):
+    cache = ResultCache()
+    swept = solve(CASE_DIRECTORY + 'case15_v2.m', method='sweep', arrays=True)
+    assert swept.to_dict() == solve(CASE_DIRECTORY + 'case15_v2.m',
+                                    method='sweep')
+    first = solve_case(case14, 'clarabel', cache=cache, arrays=True)
+    second = solve_case(case14, 'clarabel', cache=cache, arrays=True)
+    assert cache.hits == 1
+    assert_array_equal(second.V, first.V)
+    assert_almost_equal(second.R, first.R, decimal=6)
+
+
+def test_save_npz_and_csv(case14, tmpdir):
+    result = solve_case(case14, 'clarabel', arrays=True)
+    npzfile = str(tmpdir.join('result.npz'))
+    result.save_npz(npzfile)
+    loaded = FlowResult.load(npzfile)
+    for name in FlowResult.__slots__:
+        assert_array_equal(getattr(loaded, name), getattr(result, name))
+    busfile, branchfile = str(tmpdir.join('bus.csv')), str(
+        tmpdir.join('branch.csv'))
+    result.save_csv(busfile, branchfile)
+    buses = genfromtxt(busfile, delimiter=',', names=True)
+    assert_array_equal(buses['bus'], result.i2e)
+    assert_array_equal(buses['V'], result.V)
+    branches = genfromtxt(branchfile, delimiter=',', names=True)
+    assert_array_equal(branches['from'], result.i2e[result.f])
+    assert_array_equal(branches['Q_to'], result.S_to.imag)
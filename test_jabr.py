@@ -2,7 +2,7 @@ import pytest
 from jabr import *
 from loadcase import load_case, z2y
 from numpy.testing import assert_almost_equal, assert_allclose
-from scipy.sparse import coo_matrix
+from scipy.sparse import coo_matrix, dok_matrix
 from numpy import array, pi
 
 
@@ -52,6 +52,15 @@ def test_z2y_normal():
     assert_almost_equal(b, bhat)
 
 
+def test_branch_arrays(case5):
+    r, x = .01, .1
+    g, b = z2y(r, x)
+    f, t, g_hat, b_hat = branch_arrays(case5.G, case5.B)
+    assert list(zip(f, t)) == case5.branch_list
+    assert_almost_equal(g_hat, [g]*4)
+    assert_almost_equal(b_hat, [b]*4)
+
+
 def test_build_U_matrices(case5):
     G, B = case5.G, case5.B
     r, x = .01, .1
@@ -201,3 +210,41 @@ def test_full_case118(case118):
     for bus, v in enumerate(Vhat):
         Vhat_e[i2e[bus]] = v
     assert_allclose(V, Vhat_e, rtol=4e-2)
+
+
+@pytest.mark.parametrize('casename', ['case5', 'case5q', 'case9', 'case14'])
+def test_gurobi_backend_matches_reference(casename, request):
+    case = request.getfixturevalue(casename)
+    u, R, I = build_gurobi_model(case)
+    u_hat, R_hat, I_hat, _ = solve_jabr(case, 'gurobi')
+    assert_almost_equal(u_hat, u, decimal=5)
+    assert sorted(R_hat) == sorted(R)
+    assert sorted(I_hat) == sorted(I)
+    for key in R:
+        assert_almost_equal(R_hat[key], R[key], decimal=5)
+        assert_almost_equal(I_hat[key], I[key], decimal=5)
+
+
+def test_recover_voltages(case14):
+    u, R, I = build_gurobi_model(case14)
+    V, theta = recover_original_variables(u, I)
+    branches = case14.branch_list
+    x = u + [R[k] for k in branches] + [I[k] for k in branches]
+    V_hat, theta_hat = recover_voltages(case14, array(x))
+    assert_almost_equal(V_hat, V)
+    assert_almost_equal(theta_hat, theta)
+
+
+def test_recover_voltages_outside_cone(case14):
+    pytest.importorskip('clarabel')
+    x = solve_conic(build_conic_problem(case14), 'clarabel').x
+    n, m = case14.n, len(case14.f)
+    f, t = case14.f[4], case14.t[4]
+    edge = x.copy()
+    # I that rounding puts just past the edge of its cone is clipped
+    edge[n+m+4] = (2*x[f]*x[t])**.5*(1 + 1e-9)
+    V, theta = recover_voltages(case14, edge)
+    assert abs(theta[f] - theta[t]) == pytest.approx(pi/2)
+    edge[n+m+4] *= 1.01
+    with pytest.raises(ValueError):
+        recover_voltages(case14, edge)
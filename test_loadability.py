@@ -0,0 +1,53 @@
+import pytest
+from copy import deepcopy
+from loadability import *
+from jabr import build_conic_problem, solve_jabr
+from loadcase import load_case
+from numpy import array, zeros
+from numpy.testing import assert_almost_equal
+
+
+CASE_DIRECTORY = '/Users/srharnett/Dropbox/power/jabr-power-flow/cases/'
+
+
+@pytest.fixture
+def case5():
+    return load_case(CASE_DIRECTORY + 'case5_renumber_tree.m')
+
+
+def scaled(case, demands):
+    case = deepcopy(case)
+    case.demands = demands
+    return case
+
+
+def test_max_loadability(case5):
+    pytest.importorskip('clarabel')
+    result = max_loadability(case5, tol=1e-5, backend='clarabel')
+    assert 0 < result.scale < result.upper <= result.scale + 1e-5
+    assert result.upper <= result.certificate_scale
+    base = case5.demand
+    u, R, I, _ = solve_jabr(scaled(case5, (1 + result.scale)*base), 'clarabel')
+    with pytest.raises(ValueError):
+        solve_jabr(scaled(case5, (1 + result.certificate_scale)*base),
+                   'clarabel')
+    assert_almost_equal(result.V, (2**.5*array(u))**.5, decimal=4)
+
+
+def test_max_loadability_certificate(case5):
+    pytest.importorskip('clarabel')
+    direction = zeros(case5.n, dtype=complex)
+    direction[4] = 1 + 1j
+    result = max_loadability(case5, direction, backend='clarabel')
+    case = scaled(case5, case5.demand + result.certificate_scale*direction)
+    problem = build_conic_problem(case)
+    y = result.certificate
+    assert_almost_equal(problem.A.T.dot(y), 0, decimal=6)
+    assert problem.b.dot(y) < 0
+
+
+def test_max_loadability_infeasible_base():
+    pytest.importorskip('clarabel')
+    case = load_case(CASE_DIRECTORY + 'case15_og.m')
+    with pytest.raises(ValueError):
+        max_loadability(case, backend='clarabel')
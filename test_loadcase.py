@@ -1,8 +1,7 @@
 import pytest
 from loadcase import *
-from jabr import z2y
 from scipy.sparse import dok_matrix
-from numpy import real, imag
+from numpy import array, real, imag
 from numpy.testing import assert_almost_equal
 
 CASE_DIRECTORY = '/Users/srharnett/Dropbox/power/jabr-power-flow/cases/'
@@ -45,7 +44,7 @@ def test_renumber_buses_medium(case14):
     demand_dict, root, _ = load_buses(case14)
     e2i = {1: 0, 2: 1, 3: 2, 4: 3, 5: 4, 6: 5, 7: 6, 8: 7, 9: 8, 10: 9, 11: 10,
            12: 11, 13: 12, 14: 13}
-    i2e = range(1, 15)
+    i2e = list(range(1, 15))
     demands = [0, 21.7+12.7j, 94.2+19j, 47.8-3.9j, 7.6+1.6j, 11.2+7.5j, 0, 0,
                29.5+16.6j, 9+5.8j, 3.5+1.8j, 6.1+1.6j, 13.5+5.8j, 14.9+5j]
     assert renumber_buses(demand_dict, root) == (e2i, i2e, demands)
@@ -140,7 +139,7 @@ def test_load_branches_medium(case14):
               (6, 8): -909.0082719752751j,
               (8, 9): (390.2049552447428-1036.5394127060915j),
               (8, 13): (142.4005487019931-302.90504569306034j)}
-    for (i, j), y in s_dict.iteritems():
+    for (i, j), y in s_dict.items():
         Ghat[i, j] = y.real
         Ghat[j, i] = y.real
         Bhat[i, j] = y.imag
@@ -175,7 +174,99 @@ def test_load_case():
         B[j, i] = b
     c = load_case(casefile)
     assert c.demands == demands
-    assert c.G == G
-    assert c.B == B
+    assert (c.G != G).nnz == 0
+    assert (c.B != B).nnz == 0
     assert c.vhat == vhat
     assert c.i2e == i2e
+
+
+def assert_same_case(c, c_hat):
+    assert c.demands == c_hat.demands
+    assert dict(c.G.items()) == dict(c_hat.G.items())
+    assert dict(c.B.items()) == dict(c_hat.B.items())
+    assert c.branch_list == c_hat.branch_list
+    assert c.branch_map == c_hat.branch_map
+    assert c.vhat == c_hat.vhat
+    assert c.i2e == c_hat.i2e
+    assert c.gens == c_hat.gens
+
+
+@pytest.mark.parametrize('casename', [
+    'case5_renumber_tree.m', 'case5_with_q.m', 'case9_tree.m',
+    'case14_tree.m', 'case85_v2.m', 'case118_v2.m'])
+def test_load_case_matches_line_parser(casename):
+    casefile = CASE_DIRECTORY + casename
+    assert_same_case(load_case_lines(casefile), load_case(casefile))
+
+
+def test_parse_block():
+    text = """mpc.gen = [
+	1	2.5	0	3	-3	1.05;
+	4	0	0	3	-3	1;	% a comment
+];"""
+    gen = parse_block(text, 'gen')
+    assert gen.shape == (2, 6)
+    assert_almost_equal(gen[:, 5], [1.05, 1])
+    with pytest.raises(ValueError):
+        parse_block(text, 'bus')
+
+
+def test_parse_block_ragged_rows():
+    text = """mpc.branch = [
+	1	2	0.1	0.2	0	extra;
+	2	3	0.3	0.4;
+];"""
+    branch = parse_block(text, 'branch', 4)
+    assert branch.shape == (2, 4)
+    assert_almost_equal(branch[:, 3], [.2, .4])
+    with pytest.raises(ValueError, match='row 2 of mpc.branch'):
+        parse_block(text, 'branch', 5)
+
+
+def test_large_bus_numbers():
+    bus = array([[9000001, 3, 0, 0, 0, 0, 1, 1.],
+                 [9000007, 1, 1, .5, 0, 0, 1, 1.],
+                 [42, 1, 2, 1, 0, 0, 1, 1.]])
+    gen = array([[9000001, 0, 0, 0, 0, 1.]])
+    branch = array([[9000001, 42, .1, .2], [42, 9000007, .1, .2]])
+    c = case_from_blocks(bus, gen, branch)
+    assert c.i2e == [9000001, 42, 9000007]
+    assert list(c.f) + list(c.t) == [0, 1, 1, 2]
+    assert c.demands == [0, 2+1j, 1+.5j]
+    branch[1, 1] = 9000008
+    with pytest.raises(ValueError, match='no bus 9000008'):
+        case_from_blocks(bus, gen, branch)
+
+
+def test_load_case_cache(tmpdir, monkeypatch):
+    casefile = CASE_DIRECTORY + 'case14_tree.m'
+    cache_dir = str(tmpdir.join('cache'))
+    c = load_case(casefile, cache_dir=cache_dir)
+    assert len(tmpdir.join('cache').listdir()) == 1
+
+    def fail(text, name, columns):
+        raise AssertionError("cached case was parsed again")
+    monkeypatch.setattr('loadcase.parse_block', fail)
+    assert_same_case(load_case_lines(casefile), load_case(casefile, cache_dir))
+    assert_same_case(c, load_case(casefile, cache_dir))
+
+
+def test_case_branch_index():
+    c = load_case(CASE_DIRECTORY + 'case5_renumber_tree.m')
+    for (i, j), k in c.branch_map.items():
+        assert c.branch_index(i, j) == k
+    assert c.branch_index(1, 2) == -1
+    assert list(c.branch_index([0, 4, 1], [3, 3, 0])) == [1, 3, -1]
+    assert c.branch_list == [(0, 2), (0, 3), (1, 3), (3, 4)]
+
+
+def test_compatibility_properties_are_copies():
+    c = load_case(CASE_DIRECTORY + 'case5_renumber_tree.m')
+    c.demands[1] = 5
+    c.G[0, 2] = 5
+    assert c.demand[1] == 1 and c.G[0, 2] != 5
+    c.demand[1] = 5
+    c.g[0] = 5
+    assert c.demands[1] == 5 and c.G[0, 2] == 5
+    c.demands = [0, 2, 2, 2, 2]
+    assert c.demand[1] == 2
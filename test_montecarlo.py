@@ -0,0 +1,78 @@
+import pytest
+from montecarlo import *
+from jabr import solve_case
+from loadcase import load_case
+from numpy import concatenate, outer, abs
+from numpy.testing import assert_almost_equal, assert_array_equal
+
+
+CASE_DIRECTORY = '/Users/srharnett/Dropbox/power/jabr-power-flow/cases/'
+
+
+@pytest.fixture
+def case15():
+    pytest.importorskip('clarabel')
+    return load_case(CASE_DIRECTORY + 'case15_v2.m')
+
+
+def variances(case, spread):
+    return (spread*concatenate([abs(case.demand.real),
+                                abs(case.demand.imag)]))**2
+
+
+def test_sample_batches_seeded(case15):
+    batches = list(sample_batches(case15.demand, variances(case15, .2), 250,
+                                  100, seed=3))
+    assert [len(batch) for batch in batches] == [100, 100, 50]
+    again = list(sample_batches(case15.demand, variances(case15, .2), 250,
+                                100, seed=3))
+    assert_array_equal(concatenate(batches), concatenate(again))
+    other = next(sample_batches(case15.demand, variances(case15, .2), 250,
+                                100, seed=4))
+    assert (other != batches[0]).any()
+    flat = next(sample_batches(case15.demand, samples=5))
+    assert_array_equal(flat, outer([1]*5, case15.demand))
+
+
+def test_reproducible_across_workers(case15):
+    cov = variances(case15, .3)
+    one = probabilistic_flow(case15, cov, 120, batch_size=32, workers=1,
+                             backend='clarabel', keep=True)
+    two = probabilistic_flow(case15, cov, 120, batch_size=32, workers=2,
+                             backend='clarabel', keep=True)
+    assert_array_equal(one.V, two.V)
+    assert one.counts == two.counts == {'swept': 120}
+    assert one.samples == 120 and one.infeasible == 0
+    assert (one.quantiles[0] <= one.quantiles[1]).all()
+    assert (one.quantiles[1] <= one.quantiles[2]).all()
+
+
+def test_no_spread_matches_solve(case15):
+    answer = solve_case(case15, 'clarabel')
+    V = [answer[bus][0] for bus in case15.i2e]
+    result = probabilistic_flow(case15, samples=4, workers=1,
+                                backend='clarabel', vmin=.95)
+    for quantile in result.quantiles:
+        assert_almost_equal(quantile, V, decimal=6)
+    assert_array_equal(result.violation, [v < .95 for v in V])
+    assert result.any_violation == 1
+
+
+def test_triage_and_infeasible():
+    pytest.importorskip('clarabel')
+    case = load_case(CASE_DIRECTORY + 'case118_v2.m')
+    demands = outer([1, 1.1, 1000], case.demand)
+    result = probabilistic_flow(case, samples=demands, workers=1,
+                                backend='clarabel')
+    assert result.counts['solved'] == 2
+    assert result.counts.get('screened', 0) + result.counts.get(
+        'infeasible', 0) == 1
+    assert result.infeasible == pytest.approx(1/3)
+
+
+def test_screened(case15):
+    demands = outer([1, 1000], case15.demand)
+    result = probabilistic_flow(case15, samples=demands, workers=1,
+                                backend='clarabel')
+    assert result.counts == {'swept': 1, 'screened': 1}
+    assert result.infeasible == .5
@@ -0,0 +1,55 @@
+import pytest
+from prescreen import *
+from jabr import solve, solve_case, solve_jabr
+from batch import solve_many
+from loadcase import Case, Gen, load_case
+
+
+CASE_DIRECTORY = '/Users/srharnett/Dropbox/power/jabr-power-flow/cases/'
+
+
+def two_bus(load):
+    # z = 0.1 + 0.1j, so with P = Q the condition r*P + x*Q <= 1/4 is exact
+    return Case([0], [1], [5.], [-5.], [0, load*(1 + 1j)], 1., [1, 2],
+                {0: Gen(0, 1.)})
+
+
+def test_screen_two_bus_is_tight():
+    assert not screen(two_bus(1.24)).infeasible
+    solve_jabr(two_bus(1.24), 'clarabel')
+    result = screen(two_bus(1.26))
+    assert result.infeasible
+    assert result.branch == 0
+    assert result.a == pytest.approx(0.252)
+    assert result.bound == pytest.approx(0.25)
+
+
+@pytest.mark.parametrize('name, infeasible', [
+    ('case5_renumber_tree.m', False), ('case9_tree.m', False),
+    ('case118_v2.m', False), ('case85_v2.m', False),
+    ('case15_og.m', True), ('case85.m', True), ('case85_Q.m', True)])
+def test_screen_cases(name, infeasible):
+    case = load_case(CASE_DIRECTORY + name)
+    result = screen(case)
+    assert result.infeasible == infeasible
+    if infeasible:
+        assert result.a > result.bound
+        assert 0 <= result.branch < case.n - 1
+
+
+def test_solve_screened():
+    with pytest.raises(ScreenedOut) as error:
+        solve(CASE_DIRECTORY + 'case15_og.m', screen=True)
+    assert error.value.screen.infeasible
+    answer = solve_case(load_case(CASE_DIRECTORY + 'case5_renumber_tree.m'),
+                        screen=True)
+    assert len(answer) == 5
+
+
+def test_solve_many_tags():
+    cases = [CASE_DIRECTORY + 'case5_renumber_tree.m',
+             CASE_DIRECTORY + 'case15_og.m']
+    tags = [o.tag for o in sorted(solve_many(cases, workers=2, screen=True))]
+    assert tags == ['solved', 'screened']
+    tags = [o.tag for o in sorted(solve_many(cases, workers=2))]
+    assert tags == ['solved', 'failed']
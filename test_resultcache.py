@@ -0,0 +1,90 @@
+import os
+import shutil
+import pytest
+from resultcache import *
+from jabr import solve, solve_case
+from loadcase import load_case
+
+
+CASE_DIRECTORY = '/Users/srharnett/Dropbox/power/jabr-power-flow/cases/'
+
+
+@pytest.fixture
+def case15():
+    return load_case(CASE_DIRECTORY + 'case15_v2.m')
+
+
+def test_case_key(case15, tmpdir):
+    key = case_key(case15)
+    casefile = str(tmpdir.join('copy.m'))
+    shutil.copyfile(CASE_DIRECTORY + 'case15_v2.m', casefile)
+    assert case_key(load_case(casefile)) == key
+    assert case_key(case15, backend='clarabel') != key
+    assert case_key(case15, method='sweep') != key
+    assert case_key(case15, check=True) != key
+    case15.demand[3] += 1e-12
+    assert case_key(case15) != key
+    case15.demand[3] -= 1e-12
+    case15.demand[0] = -0.
+    assert case_key(case15) == key
+
+
+def test_memory_tier(case15):
+    pytest.importorskip('clarabel')
+    cache = ResultCache(size=1)
+    answer = solve_case(case15, 'clarabel', cache=cache)
+    assert (cache.hits, cache.misses) == (0, 1)
+    answer2, stats = solve_case(case15, 'clarabel', cache=cache, stats=True)
+    assert answer2 == answer
+    assert stats.status == 'cached'
+    assert [name for name, _ in stats.stages] == ['cache']
+    assert (cache.hits, cache.misses) == (1, 1)
+    answer2[1] = None  # callers get a copy
+    assert solve_case(case15, 'clarabel', cache=cache) == answer
+    other = load_case(CASE_DIRECTORY + 'case9_tree.m')
+    solve_case(other, 'clarabel', cache=cache)
+    assert len(cache) == 1
+    solve_case(case15, 'clarabel', cache=cache)
+    assert cache.counters() == {'hits': 2, 'disk_hits': 0, 'misses': 3,
+                                'hit_rate': 0.4}
+
+
+def test_checked_solve_skips_unchecked_answers(case15):
+    pytest.importorskip('clarabel')
+    cache = ResultCache()
+    answer = solve_case(case15, 'clarabel', cache=cache)
+    answer2, stats = solve_case(case15, 'clarabel', cache=cache, stats=True,
+                                check=True)
+    assert stats.status != 'cached'
+    assert 'verify' in stats.seconds
+    assert (cache.hits, cache.misses) == (0, 2)
+    assert solve_case(case15, 'clarabel', cache=cache, check=True) == answer2
+    assert cache.hits == 1
+    assert answer2.keys() == answer.keys()
+
+
+def test_disk_tier(case15, tmpdir):
+    pytest.importorskip('clarabel')
+    directory = str(tmpdir.join('cache'))
+    answer = solve(CASE_DIRECTORY + 'case15_v2.m', 'clarabel',
+                   cache=ResultCache(directory=directory))
+    cache = ResultCache(directory=directory)
+    assert solve_case(case15, 'clarabel', cache=cache) == answer
+    assert (cache.hits, cache.disk_hits, cache.misses) == (0, 1, 0)
+    cache.clear()
+    assert os.listdir(directory) == []
+
+
+def test_disk_eviction(tmpdir):
+    directory = str(tmpdir)
+    cache = ResultCache(size=0, directory=directory)
+    answers = [{1: (1., 0.), i + 2: (.9, -.1*i)} for i in range(4)]
+    for i, answer in enumerate(answers):
+        cache.put('key%d' % i, answer)
+        os.utime(cache.path('key%d' % i), (i, i))
+    size = os.path.getsize(cache.path('key0'))
+    assert cache.get('key0') == answers[0]  # now the most recently used
+    cache.max_bytes = 2*size
+    cache.evict()
+    assert sorted(os.listdir(directory)) == ['key0.npz', 'key3.npz']
+    assert cache.get('key1') is None
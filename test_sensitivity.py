@@ -0,0 +1,55 @@
+import pytest
+from sensitivity import *
+from jabr import solve_case
+from loadcase import load_case
+from numpy import argsort, corrcoef, diag
+from numpy.testing import assert_almost_equal
+
+
+CASE_DIRECTORY = '/Users/srharnett/Dropbox/power/jabr-power-flow/cases/'
+
+
+def solved(casename):
+    pytest.importorskip('clarabel')
+    case = load_case(CASE_DIRECTORY + casename)
+    return case, solve_case(case, 'clarabel')
+
+
+@pytest.mark.parametrize('casename', ['case15_v2.m', 'case118_v2.m'])
+def test_columns_match_finite_differences(casename):
+    case, answer = solved(casename)
+    V, _ = answer_arrays(case, answer)
+    dP, dQ = sensitivity(case, answer).columns([1, 7, case.n - 1])
+    base = case.demand.copy()
+    eps = 1e-5
+    for k, bus in enumerate([1, 7, case.n - 1]):
+        for change, column in ((eps, dP[:, k]), (1j*eps, dQ[:, k])):
+            case.demand = base.copy()
+            case.demand[bus] += change
+            V2, _ = answer_arrays(case, solve_case(case, 'clarabel'))
+            assert_almost_equal((V2 - V)/eps, column, decimal=4)
+
+
+def test_rows_and_fixed_buses():
+    case, answer = solved('case118_v2.m')
+    S = sensitivity(case, answer)
+    dP, dQ = S.full()
+    rows_P, rows_Q = S.rows([3, 20, 0])
+    assert_almost_equal(rows_P, dP[[3, 20, 0]])
+    assert_almost_equal(rows_Q, dQ[[3, 20, 0]])
+    arrays = sensitivity(case, solve_case(case, 'clarabel', arrays=True))
+    assert_almost_equal(arrays.columns([3])[0], dP[:, [3]])
+    gens = [bus for bus in case.gens if bus != 0]
+    assert not dP[0].any() and not dQ[:, 0].any()
+    assert not dP[gens].any() and not dQ[:, gens].any()
+
+
+def test_rank_buses():
+    case, answer = solved('case15_v2.m')
+    V, _ = answer_arrays(case, answer)
+    order, impact = rank_buses(case, V)
+    assert order[-1] == 0
+    assert (impact[:-1] >= impact[1:]).all()
+    exact = -diag(sensitivity(case, answer).columns(range(case.n))[0])
+    assert list(order[:5]) == list(argsort(-exact)[:5])
+    assert corrcoef(impact[argsort(order)], exact)[0, 1] > .99
@@ -0,0 +1,95 @@
+import asyncio
+import pytest
+from service import *
+from jabr import solve_case
+from loadcase import load_case
+from numpy.testing import assert_almost_equal
+
+
+CASE_DIRECTORY = '/Users/srharnett/Dropbox/power/jabr-power-flow/cases/'
+
+
+@pytest.fixture
+def local():
+    pytest.importorskip('clarabel')
+    with LocalService(backend='clarabel', workers=2) as local:
+        yield local
+
+
+def assert_same(answer, expected):
+    assert sorted(answer) == sorted(expected)
+    for bus in expected:
+        assert_almost_equal(answer[bus], expected[bus], decimal=6)
+
+
+def test_load_and_solve(local):
+    case = load_case(CASE_DIRECTORY + 'case15_v2.m')
+    with local.client() as client:
+        assert client.load('feeder', CASE_DIRECTORY + 'case15_v2.m')['n'] == 15
+        assert_same(client.solve('feeder'), solve_case(case, 'clarabel'))
+        bus = case.i2e[7]
+        answer = client.solve('feeder', {bus: .1 + .05j})
+        case.demand[7] = .1 + .05j
+        assert_same(answer, solve_case(case, 'clarabel'))
+        stats = client.stats()
+        assert stats['cases'] == 1
+        assert stats['completed'] == 3
+        assert stats['pending'] == stats['queued'] == stats['running'] == 0
+
+
+def test_override_at_generator(local):
+    case = load_case(CASE_DIRECTORY + 'case14_tree.m')
+    k = min(bus for bus in case.gens if bus != 0)
+    with local.client() as client:
+        client.load('fourteen', CASE_DIRECTORY + 'case14_tree.m')
+        answer = client.solve('fourteen', {case.i2e[k]: .2 + .1j})
+    case.demand[k] = .2 + .1j - case.gens[k].p
+    assert_same(answer, solve_case(case, 'clarabel'))
+
+
+def test_errors(local):
+    with local.client() as client:
+        with pytest.raises(ServiceError, match='no case loaded'):
+            client.solve('missing')
+        client.load('feeder', CASE_DIRECTORY + 'case15_v2.m')
+        with pytest.raises(ServiceError, match='no bus'):
+            client.solve('feeder', {999: 1})
+        with pytest.raises(ServiceError, match='failed to converge'):
+            client.solve('feeder', {5: 100 + 100j})
+        with pytest.raises(ServiceError, match='unknown op'):
+            client.request(op='bogus')
+        client.unload('feeder')
+        assert client.stats()['cases'] == 0
+        assert client.request(op='ping')['ok']
+
+
+def test_many_clients(local):
+    case = load_case(CASE_DIRECTORY + 'case9_tree.m')
+    expected = solve_case(case, 'clarabel')
+    with local.client() as client:
+        client.load('nine', CASE_DIRECTORY + 'case9_tree.m')
+    answers = []
+
+    def ask():
+        with local.client() as client:
+            for _ in range(5):
+                answers.append(client.solve('nine'))
+
+    threads = [threading.Thread(target=ask) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert len(answers) == 20
+    for answer in answers:
+        assert_same(answer, expected)
+
+
+def test_backpressure():
+    service = SolveService('clarabel', workers=1, max_pending=1)
+    service.pending = 1  # one request already waiting
+    reply = asyncio.run(service.dispatch({'op': 'solve', 'id': 'x'}))
+    assert reply == {'ok': False, 'error': 'busy', 'pending': 1}
+    stats = asyncio.run(service.dispatch({'op': 'stats'}))
+    assert stats['rejected'] == 1 and stats['queued'] == 1
+    service.executor.shutdown()
@@ -0,0 +1,59 @@
+import pytest
+from solvestats import *
+from backends import solve_conic
+from jabr import build_conic_problem, solve, solve_case
+from loadcase import load_case
+
+
+CASE_DIRECTORY = '/Users/srharnett/Dropbox/power/jabr-power-flow/cases/'
+
+
+@pytest.fixture
+def collected():
+    collected = []
+    add_hook(collected.append)
+    yield collected
+    remove_hook(collected.append)
+
+
+def test_solve_stats(collected):
+    pytest.importorskip('clarabel')
+    answer, stats = solve(CASE_DIRECTORY + 'case14_tree.m', 'clarabel',
+                          stats=True)
+    assert answer == solve(CASE_DIRECTORY + 'case14_tree.m', 'clarabel')
+    assert [name for name, _ in stats.stages] == [
+        'load_case', 'constraint_matrix', 'model_build', 'optimize', 'recover']
+    assert stats.status == 'optimal'
+    assert stats.backend == 'clarabel'
+    assert (stats.n, stats.rows, stats.cols, stats.cones) == (14, 92, 40, 13)
+    assert stats.iterations > 0
+    assert stats.primal_residual < 1e-6
+    assert stats.dual_residual < 1e-6
+    assert stats.total == pytest.approx(sum(stats.seconds.values()))
+    assert stats.as_dict()['optimize_seconds'] == stats.seconds['optimize']
+    assert collected[0] is stats
+    assert len(collected) == 2
+
+
+def test_solve_stats_sweep_and_screen():
+    case = load_case(CASE_DIRECTORY + 'case85.m')
+    calls = []
+    with pytest.raises(ValueError):
+        solve_case(case, method='sweep', screen=True, hook=calls.append)
+    assert calls[0].status == 'screened'
+    assert list(calls[0].seconds) == ['screen']
+    case = load_case(CASE_DIRECTORY + 'case15_v2.m')
+    _, stats = solve_case(case, method='sweep', stats=True)
+    assert stats.status == 'converged'
+    assert stats.rows is None
+    assert list(stats.seconds) == ['sweep']
+
+
+def test_residuals():
+    pytest.importorskip('clarabel')
+    problem = build_conic_problem(load_case(CASE_DIRECTORY + 'case9_tree.m'))
+    solution = solve_conic(problem, 'clarabel')
+    primal, dual = residuals(problem, solution)
+    assert primal < 1e-6 and dual < 1e-6
+    shifted = solution._replace(x=solution.x + 1e-2)
+    assert residuals(problem, shifted)[0] > 1e-3
@@ -0,0 +1,83 @@
+import pytest
+from jabr import branch_arrays, build_conic_problem, solve, Infeasible
+from sweep import *
+from topology import bfs_order, levels
+from loadcase import load_case
+from numpy import pi
+from numpy.testing import assert_almost_equal
+
+
+CASE_DIRECTORY = '/Users/srharnett/Dropbox/power/jabr-power-flow/cases/'
+
+
+def run_sweep(casename):
+    case = load_case(CASE_DIRECTORY + casename)
+    f, t, g, b = branch_arrays(case.G, case.B)
+    V, theta = sweep_voltages(f, t, g, b, case.demands, case.vhat)
+    return case, V, theta
+
+
+def test_bfs_order():
+    f, t = [0, 0, 1, 3], [2, 3, 3, 4]
+    order, parent, depth = bfs_order(f, t, 5)
+    assert list(parent) == [-1, 3, 0, 0, 3]
+    assert list(depth) == [0, 2, 1, 1, 2]
+    tiers = [sorted(tier) for tier in levels(order, depth)]
+    assert tiers == [[0], [2, 3], [1, 4]]
+
+
+def test_sweep_case5():
+    V = {5: 1, 1: 0.85332805, 2: 0.98467413, 3: 0.87294854, 4: 0.85332805}
+    theta = {5: 0, 1: -27.815, 2: -5.829, 3: -20.100, 4: -27.815}
+    case, Vhat, theta_hat = run_sweep('case5_renumber_tree.m')
+    for bus, (v, t) in enumerate(zip(Vhat, theta_hat)):
+        assert_almost_equal(V[case.i2e[bus]], v, decimal=4)
+        assert_almost_equal(theta[case.i2e[bus]], 180/pi*t, decimal=2)
+
+
+def test_sweep_reuses_topology():
+    case = load_case(CASE_DIRECTORY + 'case5_renumber_tree.m')
+    V, theta = sweep_voltages(case.f, case.t, case.g, case.b, case.demand,
+                              case.vhat)
+    V_hat, theta_hat = sweep_voltages(case.f, case.t, case.g, case.b,
+                                      case.demand, case.vhat,
+                                      topology=case.topology)
+    assert V is not None
+    assert_almost_equal(V_hat, V)
+    assert_almost_equal(theta_hat, theta)
+
+
+def test_sweep_diverges_when_infeasible():
+    _, V, theta = run_sweep('case15_og.m')
+    assert V is None and theta is None
+
+
+@pytest.mark.parametrize('casename', ['case5_with_q.m', 'case9_tree.m',
+                                      'case14_tree.m'])
+def test_solve_sweep_matches_socp(casename):
+    answer = solve(CASE_DIRECTORY + casename)
+    answer_hat = solve(CASE_DIRECTORY + casename, method='sweep')
+    assert sorted(answer_hat) == sorted(answer)
+    for bus, (v, t) in answer.items():
+        assert_almost_equal(answer_hat[bus], (v, t), decimal=5)
+
+
+def test_solve_sweep_falls_back_to_socp():
+    with pytest.raises(ValueError):
+        solve(CASE_DIRECTORY + 'case15_og.m', method='sweep')
+
+
+def test_solve_certificate_of_infeasibility():
+    pytest.importorskip('clarabel')
+    casefile = CASE_DIRECTORY + 'case15_og.m'
+    with pytest.raises(Infeasible) as error:
+        solve(casefile, 'clarabel', method='sweep', certificate=True)
+    z = error.value.dual
+    problem = build_conic_problem(load_case(casefile))
+    assert abs(problem.A.T.dot(z)).max() < 1e-6
+    assert problem.b.dot(z) < 0
+
+
+def test_solve_unknown_method():
+    with pytest.raises(ValueError):
+        solve(CASE_DIRECTORY + 'case5_renumber_tree.m', method='newton')
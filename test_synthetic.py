@@ -0,0 +1,53 @@
+import pytest
+from synthetic import *
+from loadcase import load_case, save_case
+from topology import Topology
+from sweep import sweep_voltages
+from numpy import arange, bincount
+from numpy.testing import assert_almost_equal, assert_array_equal
+
+
+@pytest.mark.parametrize('n, branching, depth', [
+    (1000, 3, None), (1000, 2, 12), (50, 1, None), (200, 4, 5)])
+def test_random_tree_shape(n, branching, depth):
+    parent = random_tree(n, branching, depth, seed=7)
+    assert parent[0] == -1
+    assert (parent[1:] < arange(1, n)).all()
+    assert bincount(parent[1:]).max() <= branching
+    levels = Topology(parent[1:], arange(1, n), n).depth
+    if depth is not None:
+        assert levels.max() == depth
+
+
+def test_random_tree_too_big():
+    with pytest.raises(ValueError):
+        random_tree(8, branching=2, depth=2)
+
+
+def test_random_feeder_seeded():
+    a, b = random_feeder(300, seed=4), random_feeder(300, seed=4)
+    assert_array_equal(a.f, b.f)
+    assert_array_equal(a.demand, b.demand)
+    assert (random_feeder(300, seed=5).demand != a.demand).any()
+
+
+def test_random_feeder_drop():
+    case = random_feeder(2000, load=2., drop=.05, seed=1)
+    assert_almost_equal(case.demand.real.sum(), 2.)
+    V, _ = sweep_voltages(case.f, case.t, case.g, case.b, case.demand,
+                          case.vhat, topology=case.topology)
+    assert .9 < V.min() < .96
+
+
+def test_save_case_round_trip(tmpdir):
+    case = random_feeder(500, seed=2)
+    casefile = str(tmpdir.join('case500_random.m'))
+    save_case(case, casefile)
+    loaded = load_case(casefile)
+    assert_array_equal(loaded.f, case.f)
+    assert_array_equal(loaded.t, case.t)
+    assert_array_equal(loaded.ext, case.ext)
+    assert_almost_equal(loaded.g, case.g)
+    assert_almost_equal(loaded.b, case.b)
+    assert_almost_equal(loaded.demand, case.demand)
+    assert loaded.gens == case.gens
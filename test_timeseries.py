@@ -0,0 +1,56 @@
+import pytest
+from timeseries import *
+from jabr import solve_case
+from loadcase import load_case
+from numpy import isnan, load, outer, save, array
+from numpy.lib.format import open_memmap
+from numpy.testing import assert_almost_equal
+
+
+CASE_DIRECTORY = '/Users/srharnett/Dropbox/power/jabr-power-flow/cases/'
+
+
+@pytest.fixture
+def case15():
+    pytest.importorskip('clarabel')
+    return load_case(CASE_DIRECTORY + 'case15_v2.m')
+
+
+def test_profile_steps_match_solve(case15):
+    scales = [1., .5, 1.5]
+    demands = outer(scales, case15.demand)
+    steps = list(profile_steps(case15, demands, 'clarabel'))
+    assert [step.index for step in steps] == [0, 1, 2]
+    base = case15.demand
+    for scale, step in zip(scales, steps):
+        case15.demand = scale*base
+        answer = solve_case(case15, 'clarabel')
+        assert step.status == 'optimal'
+        assert_almost_equal(step.V, [answer[bus][0] for bus in case15.i2e],
+                            decimal=6)
+        assert_almost_equal(step.theta,
+                            [answer[bus][1] for bus in case15.i2e], decimal=6)
+
+
+def test_solve_profile_memmap(case15, tmpdir):
+    demands = outer([1., 20., .8], case15.demand)
+    path = str(tmpdir.join('demands.npy'))
+    save(path, demands)
+    demands = load(path, mmap_mode='r')
+    V = open_memmap(str(tmpdir.join('V.npy')), mode='w+', shape=(3, 15))
+    result = solve_profile(case15, demands, V=V, backend='clarabel')
+    assert result.V is V
+    assert result.status[0] == result.status[2] == 'optimal'
+    assert result.status[1] != 'optimal'
+    assert isnan(V[1]).all() and isnan(result.theta[1]).all()
+    assert (V[[0, 2]] > .9).all()
+    assert result.iterations.min() > 0
+
+
+def test_solve_profile_shapes(case15):
+    with pytest.raises(ValueError):
+        solve_profile(case15, outer([1.], case15.demand[:-1]),
+                      backend='clarabel')
+    with pytest.raises(ValueError):
+        solve_profile(case15, outer([1.], case15.demand),
+                      V=array([[1.]]), backend='clarabel')
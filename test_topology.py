@@ -0,0 +1,47 @@
+import pytest
+from topology import *
+from loadcase import load_case
+from numpy import arange
+from numpy.testing import assert_almost_equal
+
+
+CASE_DIRECTORY = '/Users/srharnett/Dropbox/power/jabr-power-flow/cases/'
+
+
+@pytest.fixture
+def tree():
+    # 0 - 2, 0 - 3, 1 - 3, 3 - 4, as in case5_renumber_tree
+    return Topology([0, 0, 1, 3], [2, 3, 3, 4], 5)
+
+
+def test_topology_parents(tree):
+    assert list(tree.parent) == [-1, 3, 0, 0, 3]
+    assert list(tree.child) == [2, 3, 1, 4]
+    assert list(tree.parent_branch) == [-1, 2, 0, 1, 3]
+    assert list(tree.size) == [5, 1, 1, 3, 1]
+
+
+def test_subtree_queries(tree):
+    assert sorted(tree.subtree(0)) == [0, 1, 2, 3, 4]
+    assert sorted(tree.subtree(3)) == [1, 3, 4]
+    assert list(tree.subtree(4)) == [4]
+    assert sorted(tree.downstream(1)) == [1, 3, 4]
+    assert list(tree.downstream(0)) == [2]
+
+
+def test_subtree_and_path_sums(tree):
+    values = arange(5) + 1.
+    assert_almost_equal(tree.subtree_sum(values), [15, 2, 3, 11, 5])
+    assert_almost_equal(tree.path_sum(values), [1, 7, 4, 5, 10])
+
+
+def test_case_topology_is_cached():
+    case = load_case(CASE_DIRECTORY + 'case118_v2.m')
+    topology = case.topology
+    assert topology is case.topology
+    assert topology.size[0] == case.n
+    for k in range(len(case.f)):
+        below = set(topology.downstream(k))
+        bus = topology.child[k]
+        assert bus in below and topology.parent[bus] not in below
+        assert len(below) == topology.size[bus]
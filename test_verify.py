@@ -0,0 +1,76 @@
+import pytest
+from verify import *
+from batch import solve_many
+from jabr import solve_case
+from loadcase import load_case
+from numpy import asarray
+from numpy.testing import assert_almost_equal
+
+
+CASE_DIRECTORY = '/Users/srharnett/Dropbox/power/jabr-power-flow/cases/'
+
+
+@pytest.fixture
+def case14():
+    pytest.importorskip('clarabel')
+    return load_case(CASE_DIRECTORY + 'case14_tree.m')
+
+
+def test_exact_solution(case14):
+    result = solve_case(case14, 'clarabel', arrays=True)
+    verification = verify(case14, result)
+    assert verification.exact
+    assert verification.max_mismatch < 1e-5
+    assert abs(verification.max_slack) < 1e-5
+    assert len(verification.mismatch) == 14
+    assert len(verification.slack) == 13
+    assert verification.mismatch[0] == 0  # the root's power is free
+
+
+def test_slack_cones_flagged(case14):
+    result = solve_case(case14, 'clarabel', arrays=True)
+    result.R = .9*result.R  # R, I no longer come from any voltages
+    verification = verify(case14, result)
+    assert not verification.exact
+    assert_almost_equal(verification.max_slack, 1 - .81, decimal=4)
+
+
+def test_wrong_voltages_flagged(case14):
+    result = solve_case(case14, 'clarabel', arrays=True)
+    V = result.V.copy()
+    V[5] *= 1.01
+    verification = verify_solution(case14, V, result.theta)
+    assert not verification.exact
+    assert abs(verification.max_slack) < 1e-12  # derived u, R, I are tight
+    assert abs(verification.mismatch[5]) > 1e-3
+
+
+def test_cone_gap_matches(case14):
+    result = solve_case(case14, 'clarabel', arrays=True)
+    slack = cone_slack(result.u, result.R, result.I, case14.f, case14.t)
+    x = result.u.tolist() + result.R.tolist() + result.I.tolist()
+    assert cone_gap(case14, asarray(x)) == slack.max()
+
+
+def test_solve_case_check(case14):
+    answer, stats = solve_case(case14, 'clarabel', stats=True, check=True)
+    assert stats.exact
+    assert 'verify' in stats.seconds
+    assert stats.as_dict()['max_mismatch'] == stats.max_mismatch
+
+
+def test_solve_case_raises_not_exact(case14, monkeypatch):
+    import jabr
+    # tolerances below the solver's accuracy make any solution inexact
+    monkeypatch.setattr(jabr, 'verify',
+                        lambda case, result: verify(case, result, -1, -1))
+    with pytest.raises(NotExact) as error:
+        solve_case(case14, 'clarabel', check=True)
+    assert error.value.result.n == 14
+    assert not error.value.verification.exact
+
+
+def test_batch_check(case14):
+    outcomes = list(solve_many([case14], workers=1, backend='clarabel',
+                               check=True))
+    assert [outcome.tag for outcome in outcomes] == ['solved']
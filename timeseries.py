@@ -0,0 +1,86 @@
+""" load profile studies: one case solved at many time steps that differ only
+in their demands, e.g. 8760 hours. one JabrSolver is built for the whole
+profile and only its demand right-hand sides change from step to step.
+
+demands is a time by bus array of complex net demands in the case's
+internal numbering (column i is bus case.i2e[i], as in case.demand). it is
+read one row at a time, so it can be a memory-mapped file as well, e.g.
+numpy.load('demands.npy', mmap_mode='r'), and the outputs of solve_profile
+can be numpy.lib.format.open_memmap files, so memory use doesn't grow with
+the length of the profile
+"""
+from __future__ import division, print_function
+from collections import namedtuple
+from numpy import asarray, empty, full, imag, nan, real
+from jabr import JabrSolver, recover_voltages
+
+
+Step = namedtuple('Step', ['index', 'V', 'theta', 'status', 'iterations',
+                           'solve_time'])
+Profile = namedtuple('Profile', ['V', 'theta', 'status', 'iterations'])
+
+
+def profile_steps(case, demands, backend='gurobi', threads=0):
+    """ yields a Step for every row of demands as soon as it is solved: the
+    row's index, the voltage magnitudes and angles (internal numbering, None
+    unless the status is 'optimal'), and the backend's status, iteration
+    count and solve time """
+    solver = JabrSolver(case, backend, threads)
+    for index in range(len(demands)):
+        demand = asarray(demands[index], dtype=complex)
+        if demand.shape != (case.n,):
+            raise ValueError("demands row %d has shape %s, expected (%d,)" %
+                             (index, demand.shape, case.n))
+        solver.update_demands(real(demand), imag(demand))
+        solution = solver.optimize()
+        V = theta = None
+        if solution.status == 'optimal':
+            V, theta = recover_voltages(case, solution.x)
+        yield Step(index, V, theta, solution.status, solution.iterations,
+                   solution.solve_time)
+
+
+def solve_profile(case, demands, V=None, theta=None, backend='gurobi',
+                  threads=0):
+    """ solves every time step of demands, writing the voltage magnitudes and
+    angles into the time by bus arrays V and theta (allocated if not given),
+    NaN for steps without a solution. returns a Profile of V, theta, and the
+    status and iteration count of every step """
+    shape = (len(demands), case.n)
+    V = empty(shape) if V is None else V
+    theta = empty(shape) if theta is None else theta
+    if V.shape != shape or theta.shape != shape:
+        raise ValueError("V and theta must have shape %s" % (shape,))
+    status = []
+    iterations = full(len(demands), -1, dtype=int)
+    for step in profile_steps(case, demands, backend, threads):
+        if step.V is None:
+            V[step.index] = theta[step.index] = nan
+        else:
+            V[step.index], theta[step.index] = step.V, step.theta
+        status.append(step.status)
+        iterations[step.index] = step.iterations
+    return Profile(V, theta, status, iterations)
+
+
+if __name__ == '__main__':
+    import sys
+    from time import time
+    from numpy import arange, cos, nanmin, pi, outer
+    from numpy.lib.format import open_memmap
+    from loadcase import load_case
+    casefile = sys.argv[1] if len(sys.argv) > 1 else 'cases/case118_v2.m'
+    hours = int(sys.argv[2]) if len(sys.argv) > 2 else 168
+    backend = sys.argv[3] if len(sys.argv) > 3 else 'gurobi'
+    case = load_case(casefile)
+    # a daily cycle between 60% and 100% of the case's demands
+    shape = .8 - .2*cos(2*pi*arange(hours)/24)
+    demands = outer(shape, case.demand)
+    V = open_memmap('profile_V.npy', mode='w+', shape=(hours, case.n))
+    start = time()
+    result = solve_profile(case, demands, V=V, backend=backend)
+    V.flush()
+    print('%d steps in %.2fs, %d not optimal, lowest voltage %.3f, '
+          'written to profile_V.npy' % (
+              hours, time() - start,
+              sum(s != 'optimal' for s in result.status), nanmin(V)))
@@ -0,0 +1,84 @@
+""" traversal orderings of a radial network, computed from its branch arrays
+"""
+from __future__ import division, print_function
+from numpy import (ones, zeros, empty, full, arange, where, flatnonzero, diff,
+                   split, add, cumsum, concatenate, asarray)
+from scipy.sparse import coo_matrix
+from scipy.sparse.csgraph import (breadth_first_order, depth_first_order,
+                                  dijkstra)
+
+
+def bfs_order(f, t, n, root=0):
+    """ returns the breadth first order of the buses starting from root, each
+    bus's parent (-1 for the root) and its depth. f and t are the branch end
+    points, as returned by jabr.branch_arrays """
+    adjacency = coo_matrix((ones(len(f)), (f, t)), shape=(n, n)).tocsr()
+    order, parent = breadth_first_order(adjacency, root, directed=False,
+                                        return_predecessors=True)
+    parent[root] = -1
+    depth = dijkstra(adjacency, directed=False, indices=root,
+                     unweighted=True).astype(int)
+    return order, parent, depth
+
+
+def levels(order, depth):
+    """ splits a breadth first order into one array of buses per depth """
+    return split(order, flatnonzero(diff(depth[order])) + 1)
+
+
+class Topology(object):
+    """ traversal index of a radial network rooted at bus 0, built once per
+    Case (see Case.topology):
+
+    order, parent, depth: breadth first order, parent bus (-1 for the root)
+        and depth of every bus
+    child, parent_branch: the downstream end of every branch, and the branch
+        joining every bus to its parent (-1 for the root)
+    preorder, tin, size: depth first order, each bus's position in it and the
+        size of its subtree. the subtree of bus i is the contiguous slice
+        preorder[tin[i]:tin[i]+size[i]], so subtree queries and path sums
+        become prefix sums along the preorder
+    """
+
+    def __init__(self, f, t, n):
+        f, t = asarray(f), asarray(t)
+        self.n = n
+        self.order, self.parent, self.depth = bfs_order(f, t, n)
+        self.levels = levels(self.order, self.depth)
+        self.child = where(self.parent[t] == f, t, f)
+        self.parent_branch = full(n, -1, dtype=int)
+        self.parent_branch[self.child] = arange(len(f))
+        adjacency = coo_matrix((ones(len(f)), (f, t)), shape=(n, n)).tocsr()
+        self.preorder = depth_first_order(adjacency, 0, directed=False,
+                                          return_predecessors=False)
+        self.tin = empty(n, dtype=int)
+        self.tin[self.preorder] = arange(n)
+        self.size = ones(n, dtype=int)
+        for tier in reversed(self.levels[1:]):
+            add.at(self.size, self.parent[tier], self.size[tier])
+
+    def subtree(self, bus):
+        """ bus and every bus downstream of it """
+        start = self.tin[bus]
+        return self.preorder[start:start + self.size[bus]]
+
+    def downstream(self, branch):
+        """ every bus downstream of branch """
+        return self.subtree(self.child[branch])
+
+    def subtree_sum(self, values):
+        """ for every bus, the sum of values over its subtree """
+        values = asarray(values)
+        total = concatenate([zeros(1, dtype=values.dtype),
+                             cumsum(values[self.preorder])])
+        return total[self.tin + self.size] - total[self.tin]
+
+    def path_sum(self, values):
+        """ for every bus, the sum of values over the buses on its path from
+        the root, both ends included. each value is added where its subtree
+        starts in the preorder and taken off where it ends """
+        values = asarray(values)
+        marks = zeros(self.n + 1, dtype=values.dtype)
+        marks[self.tin] = values
+        add.at(marks, self.tin + self.size, -values)
+        return cumsum(marks)[self.tin]
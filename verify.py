@@ -0,0 +1,95 @@
+""" checks that a solution of the Jabr relaxation is a power flow solution.
+
+the relaxation only equals the AC power flow when every cone
+2*u[f]*u[t] >= R^2 + I^2 is tight: a slack cone means the R, I the solver
+found don't come from any voltages, and the V, theta recovered from them
+don't balance the buses' power. both are checked here in a few vectorized
+passes over the branch arrays, O(n) and cheap next to the solve, so the
+check can stay on for every solve, see solve(..., check=True):
+
+the nodal mismatch is the power injected into the branches at each bus by
+the recovered voltages plus the bus's net demand, which should be 0 except
+where it is free: P and Q at the root, Q at the other generators.
+
+the cone slack of a branch is 1 - (R^2 + I^2)/(2*u[f]*u[t]), 0 if its cone
+is tight. it is only available with the solver's own u, R, I; computed from
+V and theta they are tight by construction
+"""
+from __future__ import division, print_function
+from collections import namedtuple
+from numpy import abs as nabs, asarray, bincount, imag, real, zeros
+from flowresult import FlowResult
+
+
+Verification = namedtuple('Verification', ['exact', 'mismatch', 'slack',
+                                           'max_mismatch', 'max_slack'])
+
+
+class NotExact(ValueError):
+    """ raised by solve_case(..., check=True) when the solution fails the
+    check. verification is the Verification, result the FlowResult """
+
+    def __init__(self, verification, result):
+        ValueError.__init__(self, "relaxation not exact: nodal mismatch %g, "
+                            "cone slack %g" % (verification.max_mismatch,
+                                               verification.max_slack))
+        self.verification = verification
+        self.result = result
+
+
+def injections(n, f, t, S_from, S_to):
+    """ complex power injected into the branches at each of n buses """
+    return (bincount(f, real(S_from), n) + bincount(t, real(S_to), n) +
+            1j*(bincount(f, imag(S_from), n) + bincount(t, imag(S_to), n)))
+
+
+def nodal_mismatch(case, result):
+    """ the complex power mismatch at every bus (internal numbering) of the
+    FlowResult result, 0 where the power is free """
+    mismatch = injections(case.n, case.f, case.t, result.S_from,
+                          result.S_to) + case.demand
+    mismatch[0] = 0
+    gens = asarray([bus for bus in case.gens if bus != 0], dtype=int)
+    mismatch[gens] = real(mismatch[gens])
+    return mismatch
+
+
+def cone_slack(u, R, I, f, t):
+    """ the relative slack 1 - (R^2 + I^2)/(2*u[f]*u[t]) of every branch's
+    cone """
+    uu = 2*u[f]*u[t]
+    return (uu - R*R - I*I)/uu
+
+
+def cone_gap(case, x):
+    """ the largest cone_slack in case's cones at the stacked [u, R, I]
+    solution x, 0 if the relaxation is exact """
+    n, m = case.n, len(case.f)
+    if not m:
+        return 0.
+    return float(cone_slack(x[:n], x[n:n+m], x[n+m:], case.f, case.t).max())
+
+
+def verify(case, result, max_mismatch=1e-3, max_slack=1e-4):
+    """ checks the FlowResult result of case. returns a Verification with the
+    nodal mismatch and cone slack arrays and their largest values, the
+    mismatch relative to the largest demand (or 1, if that is smaller).
+    exact is set if those are within max_mismatch and max_slack """
+    mismatch = nodal_mismatch(case, result)
+    scale = max(1., float(nabs(case.demand).max())) if case.n else 1.
+    worst = float(nabs(mismatch).max())/scale if case.n else 0.
+    if len(case.f):
+        slack = cone_slack(result.u, result.R, result.I, case.f, case.t)
+        most = float(slack.max())
+    else:
+        slack, most = zeros(0), 0.
+    return Verification(worst <= max_mismatch and most <= max_slack,
+                        mismatch, slack, worst, most)
+
+
+def verify_solution(case, V, theta, x=None, max_mismatch=1e-3,
+                    max_slack=1e-4):
+    """ verify for voltages V, theta (internal numbering) and, if given, the
+    stacked [u, R, I] solution x they were recovered from """
+    return verify(case, FlowResult.from_solution(case, V, theta, x),
+                  max_mismatch, max_slack)